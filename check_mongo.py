@@ -1,7 +1,6 @@
 from restaurant.backend.db_connection import get_db
+from restaurant.backend.fallback_journal import FallbackJournal, ACTIVE_SEGMENT
 
-import json
-import os
 
 def check_orders():
     # 1. Check MongoDB
@@ -17,21 +16,18 @@ def check_orders():
 
     print("-" * 30)
 
-    # 2. Check Local Fallback
-    fallback_file = "orders_fallback.json"
-    if os.path.exists(fallback_file):
-        try:
-            with open(fallback_file, "r") as f:
-                lines = f.readlines()
-                print(f"💾 Local Fallback Orders: {len(lines)}")
-                for line in lines[-3:]: # Show last 3
-                    data = json.loads(line)
-                    print(f"TIME: {data.get('created_at')} | Email: {data.get('user_email')} | Method: {data.get('payment_method')}")
-                    print(f"   Details: {data.get('payment_details')}")
-        except Exception as e:
-            print(f"❌ Local File Read Failed: {e}")
-    else:
-        print("💾 No local fallback file found yet.")
+    # 2. Check Local Fallback Journal
+    journal = FallbackJournal()
+    try:
+        pending = journal.pending_count()
+        print(f"💾 Local Fallback Orders pending replay: {pending} ({journal.directory})")
+        segments = journal.sealed_segments() + [journal.directory / ACTIVE_SEGMENT]
+        recent = [doc for path in segments if path.exists() for doc in journal.read_segment(path)]
+        for data in recent[-3:]: # Show last 3
+            print(f"ID: {data.get('_id')} | TIME: {data.get('created_at')} | Method: {data.get('payment_method')}")
+            print(f"   Details: {data.get('payment_details')}")
+    except Exception as e:
+        print(f"❌ Local Journal Read Failed: {e}")
 
 if __name__ == "__main__":
     check_orders()
@@ -1,6 +1,12 @@
 import streamlit as st
 import time
 import random
+import os
+import sys
+
+# The shared frontend helpers live next to the other apps
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend"))
+from menu_client import load_menu, items_for_preference
 
 # --- Configuration ---
 st.set_page_config(page_title="Foodie Hub", page_icon="🍽️", layout="wide")
@@ -38,27 +44,8 @@ def update_cart(item_name, action):
     st.rerun()
 
 # --- Menu Data ---
-MENU = {
-    "Veg": [
-        {"name": "Veg Biryani", "price": 280, "image": "https://genv.org/wp-content/uploads/2023/02/17-Vegetable-Biryani.jpg"},
-        {"name": "Dal Tadka", "price": 220, "image": "https://manjulaskitchen.com/wp-content/uploads/dal_fry_dal_tadka-1024x576.jpg"},
-        {"name": "Butter Naan (2 pcs)", "price": 90, "image": "https://allmomsrecipes.com/wp-content/uploads/2025/02/u9552142339_httpss.mj_.runhuTKdwV8Ako_Amateur_close-up_from_re_b3707721-3b44-4310-bf5f-b80db0785fc2_2.jpg"},
-        {"name": "Paneer Tikka", "price": 290, "image": "https://img.freepik.com/premium-photo/paneer-tikka-is-indian-dish-made-from-chunks-cottage-cheese-marinated-spices-grilled-tandoor_466689-76784.jpg?w=2000"},
-        {"name": "Mushroom Masala", "price": 310, "image": "https://vismaifood.com/storage/app/uploads/public/274/0cf/870/thumb__700_0_0_0_auto.jpg"},
-        {"name": "Malai Kofta", "price": 330, "image": "https://recetinas.com/wp-content/uploads/2022/07/malai-kofta-1024x682.jpg"},
-        {"name": "Veg Fried Rice", "price": 240, "image": "https://placehold.co/600x400?text=Veg+Fried+Rice"},
-    ],
-    "Non-Veg": [
-        {"name": "Chicken Curry", "price": 350, "image": "https://placehold.co/600x400?text=Chicken+Curry"},
-        {"name": "Chicken Biryani", "price": 300, "image": "https://placehold.co/600x400?text=Chicken+Biryani"},
-        {"name": "Mutton Rogan Josh", "price": 450, "image": "https://placehold.co/600x400?text=Mutton+Rogan+Josh"},
-        {"name": "Tandoori Chicken", "price": 280, "image": "https://placehold.co/600x400?text=Tandoori+Chicken"},
-        {"name": "Fish Curry", "price": 380, "image": "https://placehold.co/600x400?text=Fish+Curry"},
-        {"name": "Prawns Masala", "price": 420, "image": "https://placehold.co/600x400?text=Prawns+Masala"},
-        {"name": "Grilled Chicken", "price": 320, "image": "https://placehold.co/600x400?text=Grilled+Chicken"},
-        {"name": "Egg Curry", "price": 210, "image": "https://placehold.co/600x400?text=Egg+Curry"},
-    ]
-}
+# Every item for each preference from the shared catalog (GET /menu)
+MENU = {pref: items_for_preference(load_menu(), pref) for pref in ("Veg", "Non-Veg")}
 
 # --- Sidebar / Header ---
 st.title("🍽️ Foodie Hub")
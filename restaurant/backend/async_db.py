@@ -0,0 +1,49 @@
+from pymongo import AsyncMongoClient
+import os
+from db_connection import DB_NAME, get_pool_options, pool_stats
+
+# Async counterpart of db_connection: one AsyncMongoClient per worker, created
+# lazily inside the running event loop and closed on application shutdown.
+_async_client = None
+_async_client_pid = None
+
+
+def get_async_client():
+    global _async_client, _async_client_pid
+    pid = os.getpid()
+    if _async_client is None or _async_client_pid != pid:
+        mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+        _async_client = AsyncMongoClient(
+            mongo_uri,
+            serverSelectionTimeoutMS=3000,
+            connectTimeoutMS=3000,
+            tlsAllowInvalidCertificates=True,
+            event_listeners=[pool_stats],
+            **get_pool_options()
+        )
+        _async_client_pid = pid
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client, _async_client_pid
+    if _async_client is not None and _async_client_pid == os.getpid():
+        await _async_client.close()
+    _async_client = None
+    _async_client_pid = None
+
+
+def async_client_initialized():
+    return _async_client is not None and _async_client_pid == os.getpid()
+
+
+def get_async_db():
+    return get_async_client()[DB_NAME]
+
+
+async def check_connection_async():
+    try:
+        await get_async_db().command('ping')
+        return True
+    except Exception:
+        return False
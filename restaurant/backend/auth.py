@@ -1,27 +1,33 @@
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError
 import random
 from db_connection import get_db
+from async_db import get_async_db
 
 def get_collection():
     db = get_db()
     return db["users"]
 
+def get_collection_async():
+    return get_async_db()["users"]
+
 def create_user_mobile(mobile):
     """
-    Creates a new user with mobile number. 
+    Creates a new user with mobile number in a single upsert.
     Returns True if created, False if already exists.
     """
     users = get_collection()
-    if users.find_one({"mobile": mobile}):
-        return False
-    
     user = {
         "mobile": mobile,
         "created_at": datetime.utcnow(),
         "type": "mobile"
     }
-    users.insert_one(user)
-    return True
+    try:
+        result = users.update_one({"mobile": mobile}, {"$setOnInsert": user}, upsert=True)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent signup for the same number
+        return False
+    return result.upserted_id is not None
 
 def create_user_email(email, password):
     """
@@ -29,17 +35,17 @@ def create_user_email(email, password):
     Returns True if created, False if already exists.
     """
     users = get_collection()
-    if users.find_one({"email": email}):
-        return False
-    
     user = {
         "email": email,
         "password": password, # In production, hash this!
         "created_at": datetime.utcnow(),
         "type": "email"
     }
-    users.insert_one(user)
-    return True
+    try:
+        result = users.update_one({"email": email}, {"$setOnInsert": user}, upsert=True)
+    except DuplicateKeyError:
+        return False
+    return result.upserted_id is not None
 
 def verify_user_mobile(mobile):
     """
@@ -56,3 +62,69 @@ def verify_user_email(email, password):
     users = get_collection()
     user = users.find_one({"email": email, "password": password})
     return user is not None
+
+# --- Async versions used by the FastAPI endpoints ---
+
+async def create_user_mobile_async(mobile):
+    """
+    Async version of create_user_mobile.
+    """
+    users = get_collection_async()
+    user = {
+        "mobile": mobile,
+        "created_at": datetime.utcnow(),
+        "type": "mobile"
+    }
+    try:
+        result = await users.update_one({"mobile": mobile}, {"$setOnInsert": user}, upsert=True)
+    except DuplicateKeyError:
+        return False
+    return result.upserted_id is not None
+
+async def create_user_email_async(email, password):
+    """
+    Async version of create_user_email.
+    """
+    users = get_collection_async()
+    user = {
+        "email": email,
+        "password": password, # In production, hash this!
+        "created_at": datetime.utcnow(),
+        "type": "email"
+    }
+    try:
+        result = await users.update_one({"email": email}, {"$setOnInsert": user}, upsert=True)
+    except DuplicateKeyError:
+        return False
+    return result.upserted_id is not None
+
+async def verify_user_mobile_async(mobile):
+    """
+    Async version of verify_user_mobile.
+    """
+    users = get_collection_async()
+    user = await users.find_one({"mobile": mobile}, {"_id": 1})
+    return user is not None
+
+async def verify_user_email_async(email, password):
+    """
+    Async version of verify_user_email.
+    """
+    users = get_collection_async()
+    user = await users.find_one({"email": email, "password": password}, {"_id": 1})
+    return user is not None
+
+def build_users_filter(user_type=None, created_from=None, created_to=None):
+    """
+    Builds the Mongo filter for user listings.
+    """
+    query = {}
+    if user_type:
+        query["type"] = user_type
+    if created_from or created_to:
+        query["created_at"] = {}
+        if created_from:
+            query["created_at"]["$gte"] = datetime.fromisoformat(created_from)
+        if created_to:
+            query["created_at"]["$lt"] = datetime.fromisoformat(created_to)
+    return query
@@ -0,0 +1,77 @@
+"""
+Requests/sec of the sync (threadpool) endpoints vs the async endpoints.
+
+Runs both apps in-process through httpx's ASGI transport against the
+MongoDB in MONGO_URI, so the only difference measured is def vs async def
+(sync handlers are capped by the 40-thread anyio limiter).
+
+    python benchmarks/bench_async_endpoints.py --clients 500 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+
+import auth
+import main
+
+BENCH_MOBILE = "9000000000"
+
+
+def build_sync_app():
+    # The pre-async handlers, calling the blocking compatibility shim
+    legacy = FastAPI()
+
+    @legacy.get("/verify/mobile/{mobile}")
+    def verify_mobile(mobile: str):
+        return {"exists": auth.verify_user_mobile(mobile)}
+
+    return legacy
+
+
+async def run(app, clients, total):
+    transport = httpx.ASGITransport(app=app)
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+    errors = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal errors
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                response = await client.get(f"/verify/mobile/{BENCH_MOBILE}")
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    return total / elapsed, errors
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    auth.create_user_mobile(BENCH_MOBILE)
+
+    for name, app in (("sync (before)", build_sync_app()), ("async (after)", main.app)):
+        rps, errors = asyncio.run(run(app, args.clients, args.requests))
+        print(f"{name:15} {rps:10.1f} req/s  errors={errors}  clients={args.clients}")
+
+
+if __name__ == "__main__":
+    main_cli()
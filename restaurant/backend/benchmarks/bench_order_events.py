@@ -0,0 +1,91 @@
+"""
+Fan-out cost of the order event bus with many SSE subscribers on one worker.
+
+Each subscriber runs the same sse_stream generator the /orders/events
+endpoint serves; the benchmark publishes events and measures how long it
+takes until every subscriber has produced every SSE frame.
+
+    python benchmarks/bench_order_events.py --subscribers 5000 --events 100
+"""
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ORDER_EVENTS_SOURCE", "local")
+
+from bson import ObjectId
+
+import order_events
+
+
+async def run(subscribers, events, slow_fraction):
+    received = [0] * subscribers
+    done = asyncio.Event()
+    finished = 0
+    slow_count = int(subscribers * slow_fraction)
+
+    async def consume(index):
+        nonlocal finished
+        stream = order_events.sse_stream(order_events.bus.subscribe())
+        await stream.__anext__()  # retry: preamble
+        slow = index < slow_count
+        try:
+            while received[index] < events:
+                await stream.__anext__()
+                received[index] += 1
+                if slow:
+                    await asyncio.sleep(0.01)
+        except StopAsyncIteration:
+            pass
+        finally:
+            await stream.aclose()
+        finished += 1
+        if finished == subscribers - slow_count:
+            done.set()
+
+    tasks = [asyncio.create_task(consume(i)) for i in range(slow_count, subscribers)]
+    slow_tasks = [asyncio.create_task(consume(i)) for i in range(slow_count)]
+    await asyncio.sleep(0.1)  # let every subscriber register
+
+    publish_times = []
+    started = time.perf_counter()
+    for i in range(events):
+        t0 = time.perf_counter()
+        order_events.bus.publish(order_events.order_event("order_status", {
+            "_id": ObjectId(), "order_status": "Preparing", "version": i + 2
+        }))
+        publish_times.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0)
+    await done.wait()
+    elapsed = time.perf_counter() - started
+
+    for task in slow_tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, *slow_tasks, return_exceptions=True)
+    return elapsed, publish_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order event fan-out benchmark")
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=100)
+    parser.add_argument("--slow-fraction", type=float, default=0.01,
+                        help="fraction of subscribers that read slowly (exercises backpressure)")
+    args = parser.parse_args()
+
+    elapsed, publish_times = asyncio.run(run(args.subscribers, args.events, args.slow_fraction))
+    frames = (args.subscribers - int(args.subscribers * args.slow_fraction)) * args.events
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"subscribers={args.subscribers} events={args.events} slow={args.slow_fraction:.0%}")
+    print(f"delivered {frames} frames in {elapsed:.2f}s ({frames / elapsed:,.0f} frames/s)")
+    print(f"publish() per event: median {statistics.median(publish_times):.2f} ms, max {max(publish_times):.2f} ms")
+    print(f"peak RSS {rss_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Stored order size and request validation cost: free-form cart vs line items.
+
+Builds orders the way the Streamlit apps send them ({name: {name, price,
+image, quantity}}) and compares the BSON size of the stored document with
+the old dict cart against the OrderItem line-item cart, plus the time the
+Order model takes to validate each request shape.
+
+    python benchmarks/bench_order_size.py --orders 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bson
+
+from main import Order
+from menu_catalog import catalog
+from orders import build_order_doc
+from pricing import price_cart
+
+
+def session_cart(rng):
+    items = rng.sample(list(catalog.by_id.values()), rng.randint(2, 6))
+    return {
+        item["name"]: {"name": item["name"], "price": item["price"], "image": item["image"], "quantity": rng.randint(1, 4)}
+        for item in items
+    }
+
+
+def request_body(cart, compact):
+    if compact:
+        lines = [{"item_id": catalog.lookup(name=name)["id"], "quantity": line["quantity"], "unit_price": line["price"]}
+                 for name, line in cart.items()]
+    else:
+        lines = cart
+    return {
+        "name": "Size Test",
+        "mobile": "9876543210",
+        "address": "12 Benchmark Road, Bengaluru",
+        "cart": lines,
+        "total": sum(line["price"] * line["quantity"] for line in cart.values()),
+        "people": 4,
+        "payment_method": "Cash on Delivery"
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order document size benchmark")
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    catalog.refresh()
+    carts = [session_cart(rng) for _ in range(args.orders)]
+
+    old_bytes = new_bytes = 0
+    for cart in carts:
+        body = request_body(cart, compact=False)
+        old_doc = build_order_doc(body)
+        old_doc["created_at"] = datetime.utcnow().isoformat()
+        old_bytes += len(bson.encode(old_doc))
+
+        data = Order.model_validate(body).model_dump()
+        data["cart"], data["total"] = price_cart(data["cart"], data["total"])
+        new_bytes += len(bson.encode(build_order_doc(data)))
+
+    print(f"orders={args.orders}")
+    print(f"{'stored, dict cart with images':34} {old_bytes / args.orders:8.0f} B/order")
+    print(f"{'stored, OrderItem line items':34} {new_bytes / args.orders:8.0f} B/order  ({old_bytes / new_bytes:.1f}x smaller)")
+
+    for label, compact in (("request, session cart", False), ("request, compact line items", True)):
+        raw = [json.dumps(request_body(cart, compact)) for cart in carts]
+        started = time.perf_counter()
+        for body in raw:
+            Order.model_validate_json(body)
+        elapsed = time.perf_counter() - started
+        size = sum(len(body) for body in raw) / len(raw)
+        print(f"{label:34} {size:8.0f} B/request  {elapsed / len(raw) * 1e6:6.1f} us to validate")
+
+
+if __name__ == "__main__":
+    main()
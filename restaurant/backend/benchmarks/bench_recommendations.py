@@ -0,0 +1,89 @@
+"""
+Bundle recommendation cost: the old inline CHECKOUT loop vs recommendations.py.
+
+Builds a catering-size menu slot (most item names match no category, so
+the old code's fallback scans run over the whole menu) and times one
+bundle per party size with each implementation.
+
+    python benchmarks/bench_recommendations.py --items 5000 --repeat 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendations import SlotIndex, build_bundle
+
+WORDS = ["Spicy", "Classic", "Royal", "Smoky", "Crispy", "Garden", "Coastal", "Tandoori", "Butter", "Herb"]
+DISHES = ["Roti", "Curry", "Rice", "Thali", "Vada", "Salad", "Soup", "Kebab", "Wrap", "Platter"]
+
+
+def catering_menu(n, rng):
+    items = [{"name": f"{rng.choice(WORDS)} {rng.choice(DISHES)} #{i}", "price": rng.randint(40, 600)} for i in range(n)]
+    # Categories that only match near the end of the menu are the old code's worst case
+    for item in items[:int(n * 0.9)]:
+        item["name"] = item["name"].replace("Roti", "Salad").replace("Thali", "Soup").replace("Vada", "Wrap")
+    sweets = [{"name": "Rasgulla", "price": 70}, {"name": "Gulab Jamun", "price": 60}]
+    return items, sweets
+
+
+def legacy_bundle(available_items, sweets, num_people, appetite):
+    """The CHECKOUT step's original item selection, kept verbatim for comparison."""
+    used_items = []
+    portion_factor = 0.7 if "Low" in appetite else 1.3 if "Large" in appetite else 1.0
+
+    def get_unique_items(keywords, count):
+        selected = []
+        for item in available_items:
+            if any(k.lower() in item["name"].lower() for k in keywords) and item["name"] not in [i["name"] for i in used_items]:
+                selected.append(item); used_items.append(item)
+                if len(selected) == count: return selected
+        for item in available_items:
+            if item["name"] not in [i["name"] for i in used_items]:
+                selected.append(item); used_items.append(item)
+                if len(selected) == count: return selected
+        return selected
+
+    roti_list = get_unique_items(["Roti", "Naan", "Dosa", "Paratha", "Bhature", "Chapathi", "Chapthi"], 1)
+    curry_list = get_unique_items(["Curry", "Paneer", "Kofta", "Masala", "Tikka", "Mushroom", "Malai"], 2 if num_people >= 6 else 1)
+    rice_list = get_unique_items(["Rice", "Biryani", "Pallav", "Poha", "Fried Rice"], 1)
+    thali_list = get_unique_items(["Thali"], 1)
+    special_list = get_unique_items(["Bonda", "Chole", "Idli", "Vada"], 1)
+    sweet_list = [next((item for item in sweets if "Jamun" in item["name"]), sweets[0])]
+    lists = (roti_list, curry_list, rice_list, thali_list, special_list, sweet_list)
+    return [(item["name"], max(1, round(num_people * portion_factor))) for group in lists for item in group]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle recommendation benchmark")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    items, sweets = catering_menu(args.items, rng)
+
+    index_ms = timed(lambda: SlotIndex(items), max(1, args.repeat // 4))
+    index = SlotIndex(items)
+    print(f"menu items={args.items}  slot index build (once per menu version): {index_ms:.2f} ms")
+    print(f"{'people':>7} {'inline loop':>13} {'recommendations':>16} {'speedup':>8}")
+    for people in (2, 8, 50, 500, 2000):
+        legacy_ms = timed(lambda: legacy_bundle(items, sweets, people, "Medium"), args.repeat)
+        new_ms = timed(lambda: build_bundle(index, sweets, people, "Medium"), args.repeat)
+        print(f"{people:>7} {legacy_ms:>10.3f} ms {new_ms:>13.4f} ms {legacy_ms / new_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Serialization and compression cost of a large /orders payload.
+
+Compares FastAPI's default path (jsonable_encoder + json.dumps) with
+FastJSONResponse (orjson, no encoder pass), then gzip/brotli on the result.
+
+    python benchmarks/bench_serialization.py --orders 100000
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from responses import FastJSONResponse, orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_orders(n):
+    orders = []
+    for i in range(n):
+        orders.append({
+            "order_id": ObjectId(),
+            "customer_name": f"Customer {i}",
+            "customer_mobile": f"9{i:09d}",
+            "delivery_address": f"{i} Long Street, Bengaluru",
+            "cart": [
+                {"item_id": "masala-dosa", "name": "Masala Dosa", "quantity": 2, "unit_price": 120},
+                {"item_id": "idli-vada", "name": "Idli Vada", "quantity": 2, "unit_price": 80}
+            ],
+            "total_amount": 400.0,
+            "people_count": 2,
+            "payment_method": "UPI",
+            "order_status": "Placed",
+            "created_at": datetime.utcnow()
+        })
+    return {"orders": orders, "count": n, "next_after": None}
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization/compression benchmark")
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payload = make_orders(args.orders)
+
+    default_ms, default_body = timed(
+        lambda: json.dumps(jsonable_encoder(payload, custom_encoder={ObjectId: str}),
+                           ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        args.repeat)
+    fast_ms, fast_body = timed(lambda: FastJSONResponse(payload).body, args.repeat)
+
+    print(f"orders={args.orders}  orjson={'yes' if orjson else 'no (stdlib fallback)'}")
+    print(f"{'default (jsonable_encoder + json)':36} {default_ms:9.1f} ms  {len(default_body) / 1e6:7.1f} MB")
+    print(f"{'FastJSONResponse':36} {fast_ms:9.1f} ms  {len(fast_body) / 1e6:7.1f} MB  ({default_ms / fast_ms:.1f}x faster)")
+
+    gzip_ms, gzipped = timed(lambda: gzip.compress(fast_body, compresslevel=9), 1)
+    print(f"{'gzip level 9 (GZipMiddleware)':36} {gzip_ms:9.1f} ms  {len(gzipped) / 1e6:7.1f} MB  ({len(fast_body) / len(gzipped):.1f}x smaller)")
+    if brotli is not None:
+        br_ms, brotlied = timed(lambda: brotli.compress(fast_body, quality=4), 1)
+        print(f"{'brotli quality 4 (BrotliMiddleware)':36} {br_ms:9.1f} ms  {len(brotlied) / 1e6:7.1f} MB  ({len(fast_body) / len(brotlied):.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Load test for the FastAPI backend.
+
+Drives /order/place, /signup/mobile, /login/email, /orders and /status
+with a weighted request mix and a fixed number of concurrent clients,
+then reports p50/p95/p99 latency and throughput per endpoint and saves
+the results as JSON (tagged with the current git commit) under the
+system temp directory, or to --output.
+
+    # offline, in-process app on an in-memory Mongo stand-in
+    python benchmarks/loadtest.py --backend memory --concurrency 100 --requests 5000
+
+    # in-process app on the MongoDB in MONGO_URI (e.g. a local mongod)
+    python benchmarks/loadtest.py --backend mongod
+
+    # an already running server
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000
+
+    # compare with an earlier run
+    python benchmarks/loadtest.py --backend memory --output before.json
+    python benchmarks/loadtest.py --backend memory --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx
+
+# Outside the source tree, so runs never leave files for git to pick up
+RESULTS_DIR = Path(tempfile.gettempdir()) / "restaurant-loadtest"
+DEFAULT_MIX = "order_place=40,signup_mobile=10,login_email=25,orders=15,status=10"
+
+BENCH_EMAIL = "loadtest@example.com"
+BENCH_PASSWORD = "loadtest"
+
+
+def sample_order():
+    quantity = random.randint(1, 4)
+    return {
+        "name": "Load Test",
+        "mobile": f"9{random.randint(100000000, 999999999)}",
+        "address": "1 Benchmark Street",
+        "notes": None,
+        "cart": {
+            "Masala Dosa": {"name": "Masala Dosa", "price": 120.0, "quantity": quantity},
+            "Idli Vada": {"name": "Idli Vada", "price": 80.0, "quantity": quantity}
+        },
+        "total": 200.0 * quantity,
+        "people": quantity,
+        "appetite": "Medium",
+        "preference": "Veg",
+        "payment_method": "Cash on Delivery"
+    }
+
+
+def build_request(op):
+    """Returns (method, path, json_body, headers) for one operation."""
+    if op == "order_place":
+        return "POST", "/order/place", sample_order(), {"Idempotency-Key": uuid.uuid4().hex}
+    if op == "signup_mobile":
+        return "POST", "/signup/mobile", {"mobile": f"8{random.randint(100000000, 999999999)}"}, None
+    if op == "login_email":
+        return "POST", "/login/email", {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}, None
+    if op == "orders":
+        return "GET", "/orders?limit=50", None, None
+    if op == "status":
+        return "GET", "/status", None, None
+    raise ValueError(f"Unknown operation: {op}")
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        op, _, weight = part.partition("=")
+        build_request(op.strip())  # validates the name
+        weights[op.strip()] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    summary = {}
+    for op, values in latencies.items():
+        values = sorted(values)
+        summary[op] = {
+            "requests": len(values),
+            "errors": errors.get(op, 0),
+            "throughput_rps": round(len(values) / elapsed, 1),
+            "mean_ms": round(statistics.fmean(values), 3) if values else 0.0,
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+            "max_ms": round(values[-1], 3) if values else 0.0
+        }
+    everything = sorted(v for values in latencies.values() for v in values)
+    summary["all"] = {
+        "requests": len(everything),
+        "errors": sum(errors.values()),
+        "throughput_rps": round(len(everything) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(everything), 3) if everything else 0.0,
+        "p50_ms": round(percentile(everything, 50), 3),
+        "p95_ms": round(percentile(everything, 95), 3),
+        "p99_ms": round(percentile(everything, 99), 3),
+        "max_ms": round(everything[-1], 3) if everything else 0.0
+    }
+    return summary
+
+
+async def drive(client, weights, concurrency, total_requests, duration):
+    ops = list(weights)
+    op_weights = [weights[op] for op in ops]
+    latencies = {op: [] for op in ops}
+    errors = {}
+    issued = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    def take():
+        nonlocal issued
+        if deadline is not None:
+            return time.perf_counter() < deadline
+        if issued >= total_requests:
+            return False
+        issued += 1
+        return True
+
+    async def worker():
+        while take():
+            op = random.choices(ops, op_weights)[0]
+            method, path, body, headers = build_request(op)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, headers=headers)
+                ok = response.status_code < 400 or (op == "signup_mobile" and response.status_code == 400)
+            except httpx.HTTPError:
+                ok = False
+            latencies[op].append((time.perf_counter() - started) * 1000)
+            if not ok:
+                errors[op] = errors.get(op, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def run(args, weights):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=30, limits=limits) as client:
+            await client.post("/signup/email", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+            return await drive(client, weights, args.concurrency, args.requests, args.duration)
+
+    if args.backend == "memory":
+        import memory_mongo
+        memory_mongo.install()
+    import main
+
+    await main.open_db_client()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=30, limits=limits) as client:
+            await client.post("/signup/email", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+            return await drive(client, weights, args.concurrency, args.requests, args.duration)
+    finally:
+        await main.close_db_client()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_summary(summary, baseline=None):
+    print(f"{'endpoint':15} {'reqs':>7} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for op, row in summary.items():
+        line = (f"{op:15} {row['requests']:7d} {row['errors']:5d} {row['throughput_rps']:9.1f} "
+                f"{row['p50_ms']:9.2f} {row['p95_ms']:9.2f} {row['p99_ms']:9.2f}")
+        if baseline and op in baseline:
+            old = baseline[op]
+            if old["p95_ms"]:
+                line += f"   p95 {100 * (row['p95_ms'] - old['p95_ms']) / old['p95_ms']:+.1f}%"
+            if old["throughput_rps"]:
+                line += f"  rps {100 * (row['throughput_rps'] - old['throughput_rps']) / old['throughput_rps']:+.1f}%"
+        print(line)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Backend load test")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--backend", choices=["memory", "mongod"], default="memory",
+                        help="database for the in-process app (memory needs benchmarks/requirements.txt)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--duration", type=float, help="run for N seconds instead of a request count")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted operations (default: {DEFAULT_MIX})")
+    parser.add_argument("--output", help=f"results file (default: {RESULTS_DIR}/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    weights = parse_mix(args.mix)
+    latencies, errors, elapsed = asyncio.run(run(args, weights))
+    summary = summarize(latencies, errors, elapsed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+    print_summary(summary, baseline)
+
+    commit = git_commit()
+    result = {
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(),
+        "target": args.url or f"in-process/{args.backend}",
+        "concurrency": args.concurrency,
+        "mix": weights,
+        "elapsed_s": round(elapsed, 3),
+        "summary": summary
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%S}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results saved to {output}")
+    return 1 if summary["all"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
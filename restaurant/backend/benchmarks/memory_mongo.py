@@ -0,0 +1,121 @@
+"""
+In-memory MongoDB stand-in for offline benchmarks.
+
+Wraps a mongomock client in the small async surface the backend uses
+from AsyncMongoClient, and points db_connection / async_db at it.
+Call install() before importing main. Requires mongomock
+(pip install -r benchmarks/requirements.txt).
+"""
+import asyncio
+import os
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+import async_db
+import db_connection
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._iter = None
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    def skip(self, n):
+        self._cursor = self._cursor.skip(n)
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    async def to_list(self, length=None):
+        docs = list(self._cursor)
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        self._iter = iter(self._cursor)
+        return self
+
+    async def __anext__(self):
+        try:
+            doc = next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+        # Yield to the loop like a real network cursor would
+        await asyncio.sleep(0)
+        return doc
+
+    async def close(self):
+        pass
+
+
+class AsyncCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return attr(*args, **kwargs)
+        return call
+
+
+class AsyncDatabase:
+    def __init__(self, db):
+        self._db = db
+
+    def __getitem__(self, name):
+        return AsyncCollection(self._db[name])
+
+    def __getattr__(self, name):
+        attr = getattr(self._db, name)
+
+        async def call(*args, **kwargs):
+            return attr(*args, **kwargs)
+        return call
+
+
+class AsyncClient:
+    def __init__(self, client):
+        self._client = client
+
+    def __getitem__(self, name):
+        return AsyncDatabase(self._client[name])
+
+    async def close(self):
+        pass
+
+
+def install():
+    """Routes the backend's sync and async clients to one shared in-memory store."""
+    if mongomock is None:
+        raise RuntimeError("The in-memory backend needs mongomock: pip install -r benchmarks/requirements.txt")
+    # mongomock has no change streams
+    os.environ.setdefault("ORDER_EVENTS_SOURCE", "local")
+    sync_client = mongomock.MongoClient()
+    async_client = AsyncClient(sync_client)
+
+    async def close_async_client():
+        pass
+
+    db_connection.get_client = lambda: sync_client
+    db_connection.close_client = lambda: None
+    async_db.get_async_client = lambda: async_client
+    async_db.close_async_client = close_async_client
+    return sync_client
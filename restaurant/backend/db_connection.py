@@ -1,29 +1,174 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
 import os
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
+try:
+    from log import get_logger
+except ImportError:  # Imported as restaurant.backend.* (check_mongo.py)
+    from .log import get_logger
 
 # Load .env from the same directory as this file
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-def get_db():
+logger = get_logger("db")
+
+DB_NAME = os.getenv("DB_NAME", "restaurant_db")
+
+# One MongoClient per process. MongoClient is thread-safe and keeps its own
+# connection pool, so every request should share it instead of building a
+# new one (and paying the handshake + server selection) each time.
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts connection pool events so checkout waits can be watched under load."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.checkouts_started = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.checkins = 0
+            self.pool_clears = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.checkouts_started += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            # The event carries the wait itself (pymongo >= 4.7). Timing it here by
+            # thread would mix up concurrent async checkouts, which all happen on
+            # the event loop thread.
+            duration = getattr(event, "duration", None)
+            if duration is not None:
+                wait_ms = duration * 1000
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checkins += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "connections_open": self.connections_created - self.connections_closed,
+                "checked_out": self.checkouts - self.checkins,
+                "checkouts_started": self.checkouts_started,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
+
+
+pool_stats = PoolStatsListener()
+
+
+def get_pool_options():
+    """Pool sizing, overridable via MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE / MONGO_MAX_IDLE_TIME_MS."""
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000")),
+    }
+
+
+def _create_client():
     mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
-    
-    # Debug: Print where we are connecting (hiding credentials)
+
+    # Log where we are connecting (hiding credentials)
     cluster_info = mongo_uri.split("@")[-1].split("/")[0] if "@" in mongo_uri else "localhost"
-    print(f"--- DB ATTEMPT: {cluster_info} ---")
-    
+    logger.info("MongoDB client created", extra={"fields": {"cluster": cluster_info, "pid": os.getpid()}})
+
     # Using a very short timeout for quick response in case of failure
     # Also allowing insecure TLS to bypass local environment handshake issues
-    client = MongoClient(
-        mongo_uri, 
+    return MongoClient(
+        mongo_uri,
         serverSelectionTimeoutMS=3000,
         connectTimeoutMS=3000,
-        tlsAllowInvalidCertificates=True
+        tlsAllowInvalidCertificates=True,
+        event_listeners=[pool_stats],
+        **get_pool_options()
     )
-    db = client["restaurant_db"] 
-    return db
+
+
+def get_client():
+    """
+    Returns the process-wide MongoClient, creating it on first use.
+    A client inherited across fork() is not safe to use, so a child
+    process gets its own.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            # Never close a client inherited from the parent; its sockets belong to the parent.
+            _client = _create_client()
+            _client_pid = pid
+        return _client
+
+
+def close_client():
+    """Closes the shared client (called on application shutdown)."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def get_db():
+    return get_client()[DB_NAME]
+
 
 def check_connection():
     try:
@@ -32,3 +177,10 @@ def check_connection():
         return True
     except Exception:
         return False
+
+
+def get_pool_stats():
+    stats = {"pid": os.getpid(), "client_initialized": _client is not None and _client_pid == os.getpid()}
+    stats.update(get_pool_options())
+    stats.update(pool_stats.snapshot())
+    return stats
@@ -0,0 +1,43 @@
+from fastapi import Response
+import hashlib
+
+# ETag helpers for conditional GETs. Tags are computed from a document's
+# version/timestamps (or once per status refresh), never by serializing the
+# response, so a 304 costs neither bandwidth nor serialization.
+
+
+def _digest(*parts):
+    return hashlib.sha1(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+
+
+def order_etag(doc: dict):
+    """
+    Strong ETag for an order. Every write to an order bumps `version` and
+    `updated_at`; orders stored before versioning fall back to created_at.
+    """
+    return f'"{_digest(doc.get("_id"), doc.get("version", 0), doc.get("updated_at") or doc.get("created_at"))}"'
+
+
+def content_etag(content: bytes, weak=False):
+    tag = f'"{hashlib.sha1(content).hexdigest()[:20]}"'
+    return f"W/{tag}" if weak else tag
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match uses weak comparison: W/ prefixes are ignored."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def not_modified(etag):
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
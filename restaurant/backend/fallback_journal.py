@@ -0,0 +1,276 @@
+from bson import ObjectId, json_util
+from pathlib import Path
+from pymongo.errors import BulkWriteError
+import asyncio
+import os
+import threading
+import time
+import zlib
+try:
+    from log import get_logger
+except ImportError:  # Imported as restaurant.backend.* (check_mongo.py)
+    from .log import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within one process
+    fcntl = None
+
+# Local journal for orders that could not be written to Mongo.
+#
+# Records are appended to active.jsonl as "<crc32> <json>" lines under an
+# exclusive file lock, so several uvicorn workers can share one directory.
+# When the active segment grows past ORDER_FALLBACK_SEGMENT_BYTES (or when
+# the reconciler wants to replay it) it is sealed by renaming it to
+# segment-<ns>.jsonl. Sealed segments are claimed by renaming them again,
+# replayed with insert_many and deleted (kept as <segment>.corrupt if any
+# record failed its checksum). Every order carries its _id from
+# the start, so replaying a segment twice never duplicates an order.
+ORDER_FALLBACK_DIR = Path(os.getenv("ORDER_FALLBACK_DIR", Path(__file__).parent / "orders_fallback"))
+ORDER_FALLBACK_SEGMENT_BYTES = int(os.getenv("ORDER_FALLBACK_SEGMENT_BYTES", str(1024 * 1024)))
+
+ACTIVE_SEGMENT = "active.jsonl"
+LOCK_FILE = ".lock"
+SEGMENT_PREFIX = "segment-"
+CLAIMED_MARKER = ".replaying-"
+CORRUPT_SUFFIX = ".corrupt"
+DUPLICATE_KEY = 11000
+REPLAY_BATCH_SIZE = 500
+
+_thread_lock = threading.Lock()
+logger = get_logger("fallback_journal")
+
+
+def encode_record(doc: dict):
+    payload = json_util.dumps(doc)
+    return f"{zlib.crc32(payload.encode('utf-8')):08x} {payload}\n"
+
+
+def decode_record(line: str):
+    """Returns the order document, or None if the line is torn or corrupt."""
+    checksum, _, payload = line.rstrip("\n").partition(" ")
+    if not payload:
+        return None
+    try:
+        if int(checksum, 16) != zlib.crc32(payload.encode("utf-8")):
+            return None
+        return json_util.loads(payload)
+    except ValueError:
+        return None
+
+
+class FallbackJournal:
+    def __init__(self, directory=ORDER_FALLBACK_DIR, segment_bytes=ORDER_FALLBACK_SEGMENT_BYTES):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.corrupt_records = 0
+
+    def _locked(self):
+        return _DirectoryLock(self.directory / LOCK_FILE)
+
+    def _seal_active(self):
+        """Renames a non-empty active segment to a sealed one. Caller holds the lock."""
+        active = self.directory / ACTIVE_SEGMENT
+        if active.exists() and active.stat().st_size > 0:
+            active.rename(self.directory / f"{SEGMENT_PREFIX}{time.time_ns()}-{os.getpid()}.jsonl")
+
+    def append(self, order_doc: dict):
+        """
+        Durably appends an order and returns its id (assigned here if missing).
+        """
+        order_doc.setdefault("_id", ObjectId())
+        line = encode_record(order_doc)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            with open(self.directory / ACTIVE_SEGMENT, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            if size >= self.segment_bytes:
+                self._seal_active()
+        return str(order_doc["_id"])
+
+    def seal(self):
+        if not self.directory.exists():
+            return
+        with self._locked():
+            self._seal_active()
+
+    def sealed_segments(self):
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob(f"{SEGMENT_PREFIX}*.jsonl"))
+
+    def has_pending(self):
+        active = self.directory / ACTIVE_SEGMENT
+        return bool(self.sealed_segments()) or (active.exists() and active.stat().st_size > 0)
+
+    def pending_count(self):
+        count = 0
+        for path in self.sealed_segments() + [self.directory / ACTIVE_SEGMENT]:
+            if path.exists():
+                with open(path, "r", encoding="utf-8") as f:
+                    count += sum(1 for _ in f)
+        return count
+
+    def read_segment(self, path):
+        return self.scan_segment(path)[0]
+
+    def scan_segment(self, path):
+        """
+        (docs, corrupt) for a segment. A torn final line (a crash mid-append,
+        the request never returned) is skipped; corrupt counts complete
+        lines that fail their checksum.
+        """
+        docs = []
+        corrupt = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                doc = decode_record(line)
+                if doc is None:
+                    if line.endswith("\n"):
+                        corrupt += 1
+                        self.corrupt_records += 1
+                        logger.warning("Skipping corrupt fallback record", extra={"fields": {"segment": path.name}})
+                    continue
+                docs.append(doc)
+        return docs, corrupt
+
+    def contains(self, order_id: str):
+        """Whether an order is waiting in the journal (active, sealed or being replayed)."""
+        if not self.directory.exists():
+            return False
+        paths = [self.directory / ACTIVE_SEGMENT] + sorted(self.directory.glob(f"{SEGMENT_PREFIX}*"))
+        for path in paths:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        doc = decode_record(line)
+                        if doc is not None and str(doc["_id"]) == order_id:
+                            return True
+            except FileNotFoundError:
+                continue  # Replayed and deleted meanwhile
+        return False
+
+    def claim_segments(self):
+        """
+        Seals the active segment and claims every sealed one for replay.
+        A rename is atomic, so each segment is claimed by exactly one process.
+        """
+        self.seal()
+        claimed = []
+        for path in self.sealed_segments():
+            target = path.with_name(f"{path.name}{CLAIMED_MARKER}{os.getpid()}")
+            try:
+                path.rename(target)
+            except FileNotFoundError:
+                continue  # Claimed by another worker
+            claimed.append(target)
+        return claimed
+
+    def release(self, claimed_path, replayed: bool, corrupt=0):
+        """
+        Deletes a replayed segment, or returns it to the pending pool. A
+        replayed segment with corrupt records is kept as <segment>.corrupt
+        so those orders can be recovered by hand.
+        """
+        original = claimed_path.with_name(claimed_path.name.rsplit(CLAIMED_MARKER, 1)[0])
+        if not replayed:
+            claimed_path.rename(original)
+        elif corrupt:
+            target = original.with_name(original.name + CORRUPT_SUFFIX)
+            claimed_path.rename(target)
+            logger.warning("Kept fallback segment with corrupt records", extra={"fields": {"segment": target.name, "corrupt": corrupt}})
+        else:
+            claimed_path.unlink()
+
+    def recover_claims(self):
+        """Returns segments claimed by a process that died mid-replay to the pending pool."""
+        if not self.directory.exists():
+            return
+        for path in self.directory.glob(f"{SEGMENT_PREFIX}*{CLAIMED_MARKER}*"):
+            pid = int(path.name.rsplit(CLAIMED_MARKER, 1)[1])
+            if pid != os.getpid() and not process_alive(pid):
+                self.release(path, replayed=False)
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class _DirectoryLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        _thread_lock.acquire()
+        if fcntl is not None:
+            self._file = open(self.path, "a")
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        _thread_lock.release()
+
+
+def _raise_unless_duplicates(error: BulkWriteError):
+    errors = [err for err in error.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY]
+    if errors:
+        raise error
+
+
+def replay(journal: FallbackJournal, collection):
+    """
+    Replays every pending segment into `collection` (sync pymongo).
+    Returns the number of records replayed.
+    """
+    replayed = 0
+    for path in journal.claim_segments():
+        ok = False
+        corrupt = 0
+        try:
+            docs, corrupt = journal.scan_segment(path)
+            for i in range(0, len(docs), REPLAY_BATCH_SIZE):
+                try:
+                    collection.insert_many(docs[i:i + REPLAY_BATCH_SIZE], ordered=False)
+                except BulkWriteError as e:
+                    # Already-present _ids were inserted by an earlier, interrupted replay
+                    _raise_unless_duplicates(e)
+            replayed += len(docs)
+            ok = True
+        finally:
+            journal.release(path, ok, corrupt)
+    return replayed
+
+
+async def replay_async(journal: FallbackJournal, collection):
+    """Async version of replay for an AsyncMongoClient collection."""
+    # File work (locks, renames, fsync-contended reads) stays off the event loop
+    replayed = 0
+    for path in await asyncio.to_thread(journal.claim_segments):
+        ok = False
+        corrupt = 0
+        try:
+            docs, corrupt = await asyncio.to_thread(journal.scan_segment, path)
+            for i in range(0, len(docs), REPLAY_BATCH_SIZE):
+                try:
+                    await collection.insert_many(docs[i:i + REPLAY_BATCH_SIZE], ordered=False)
+                except BulkWriteError as e:
+                    _raise_unless_duplicates(e)
+            replayed += len(docs)
+            ok = True
+        finally:
+            await asyncio.to_thread(journal.release, path, ok, corrupt)
+    return replayed
@@ -0,0 +1,180 @@
+from bson import ObjectId
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+import hashlib
+import json
+import os
+import threading
+import time
+from async_db import get_async_db
+import orders
+
+# Idempotency-Key support for POST /order/place.
+#
+# The first request with a key reserves it in the idempotency_keys
+# collection together with a pre-assigned order _id; a TTL index expires
+# reservations after IDEMPOTENCY_TTL_SECONDS. Completed responses are also
+# kept in a per-process LRU so most replays never reach Mongo.
+#
+# A pending reservation is a lease: once it is IDEMPOTENCY_LEASE_SECONDS
+# old and its order is nowhere to be found, the worker holding it is
+# presumed dead and a retry takes the reservation over (same order _id,
+# so a late insert by the original worker is still a duplicate key).
+#
+# When the key store errors (Mongo down), it is skipped for
+# IDEMPOTENCY_STORE_RETRY_SECONDS: the request that hit the error and the
+# ones after it go straight to the fallback journal instead of paying a
+# server-selection timeout on every key-store call.
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 60 * 60)))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "30"))
+IDEMPOTENCY_STORE_RETRY_SECONDS = float(os.getenv("IDEMPOTENCY_STORE_RETRY_SECONDS", "5"))
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+
+_store_down_until = 0.0
+
+
+class IdempotencyConflict(Exception):
+    """The original request with this key is still being processed."""
+
+
+class IdempotencyMismatch(Exception):
+    """The key was already used with a different request body."""
+
+
+class TTLCache:
+    def __init__(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+
+_cache = TTLCache(IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_TTL_SECONDS)
+
+
+def get_keys_collection_async():
+    return get_async_db()[IDEMPOTENCY_COLLECTION]
+
+
+def store_available():
+    """False while the key store is being skipped after an error."""
+    return time.monotonic() >= _store_down_until
+
+
+def _mark_store_down():
+    global _store_down_until
+    _store_down_until = time.monotonic() + IDEMPOTENCY_STORE_RETRY_SECONDS
+
+
+def fingerprint(payload: dict):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _check_fingerprint(stored, request_fingerprint):
+    if stored != request_fingerprint:
+        raise IdempotencyMismatch("Idempotency-Key was already used with a different request")
+
+
+async def begin(key: str, request_fingerprint: str):
+    """
+    Returns (order_id, None) for a new key, with the ObjectId the order must
+    be stored under, or (None, response) when the key was already completed.
+    Raises IdempotencyConflict / IdempotencyMismatch.
+    """
+    cached = _cache.get(key)
+    if cached is not None:
+        _check_fingerprint(cached[0], request_fingerprint)
+        return None, cached[1]
+
+    if not store_available():
+        # The in-process cache still catches retries against this worker
+        return ObjectId(), None
+
+    keys = get_keys_collection_async()
+    reservation = {
+        "_id": key,
+        "fingerprint": request_fingerprint,
+        "order_id": ObjectId(),
+        "status": "pending",
+        "created_at": datetime.utcnow()
+    }
+    try:
+        await keys.insert_one(reservation)
+        return reservation["order_id"], None
+    except DuplicateKeyError:
+        pass
+    except PyMongoError:
+        # Store unreachable (the order will go to the fallback journal);
+        # the in-process cache still catches retries against this worker.
+        _mark_store_down()
+        return reservation["order_id"], None
+
+    existing = await keys.find_one({"_id": key})
+    if existing is None:
+        raise IdempotencyConflict("Idempotency-Key is being processed")
+    _check_fingerprint(existing["fingerprint"], request_fingerprint)
+    if existing["status"] == "completed":
+        _cache.put(key, (existing["fingerprint"], existing["response"]))
+        return None, existing["response"]
+
+    # Pending: the first attempt may have stored or buffered the order and died before completing the key
+    if await orders.order_accepted(existing["order_id"]):
+        response = {"message": "Order placed successfully", "order_id": str(existing["order_id"])}
+        await complete(key, request_fingerprint, response)
+        return None, response
+
+    # Nothing stored: take over the reservation once its lease has run out
+    now = datetime.utcnow()
+    taken = await keys.find_one_and_update(
+        {"_id": key, "status": "pending", "created_at": {"$lt": now - timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)}},
+        {"$set": {"created_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if taken is not None:
+        return taken["order_id"], None
+    raise IdempotencyConflict("Idempotency-Key is being processed")
+
+
+async def complete(key: str, request_fingerprint: str, response: dict):
+    _cache.put(key, (request_fingerprint, response))
+    if not store_available():
+        return
+    try:
+        await get_keys_collection_async().update_one(
+            {"_id": key},
+            {"$set": {"status": "completed", "response": response}}
+        )
+    except PyMongoError:
+        _mark_store_down()
+
+
+async def abort(key: str):
+    """Releases a reservation whose order was not placed so the client can retry."""
+    if not store_available():
+        return
+    try:
+        await get_keys_collection_async().delete_one({"_id": key, "status": "pending"})
+    except PyMongoError:
+        _mark_store_down()
@@ -0,0 +1,135 @@
+"""
+Index management for the users, orders and idempotency_keys collections.
+
+    python indexes.py            # create any missing indexes
+    python indexes.py --explain  # explain every backend query, exit 1 on a COLLSCAN
+"""
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+import argparse
+import sys
+from db_connection import get_db
+import orders
+from idempotency import IDEMPOTENCY_TTL_SECONDS
+from log import get_logger
+
+# (collection, keys, options). Users have either a mobile or an email, so the
+# unique indexes are partial; otherwise every user missing the field would
+# collide on null.
+INDEXES = [
+    ("users", [("mobile", ASCENDING)], {"name": "mobile_unique", "unique": True,
+                                        "partialFilterExpression": {"mobile": {"$exists": True}}}),
+    ("users", [("email", ASCENDING)], {"name": "email_unique", "unique": True,
+                                       "partialFilterExpression": {"email": {"$exists": True}}}),
+    ("orders", [("created_at", DESCENDING)], {"name": "created_at"}),
+    ("orders", [("customer_mobile", ASCENDING)], {"name": "customer_mobile"}),
+    ("orders", [("order_status", ASCENDING)], {"name": "order_status"}),
+    ("idempotency_keys", [("created_at", ASCENDING)], {"name": "created_at_ttl",
+                                                       "expireAfterSeconds": IDEMPOTENCY_TTL_SECONDS}),
+]
+
+logger = get_logger("indexes")
+
+
+def _index_failed(collection, options, error):
+    # e.g. mobile_unique over users left duplicated by the old racy signup
+    logger.warning("Could not create index", extra={"fields": {
+        "collection": collection, "index": options["name"], "error": str(error)}})
+
+
+def ensure_indexes(db=None):
+    """
+    Creates the indexes in INDEXES and returns the names created. create_index
+    is a no-op for an index that already exists with the same spec, so this
+    is safe on every startup. An index the server rejects is logged and
+    skipped so it doesn't hold back the others; connection errors propagate.
+    """
+    db = db if db is not None else get_db()
+    created = []
+    for collection, keys, options in INDEXES:
+        try:
+            created.append(db[collection].create_index(keys, **options))
+        except OperationFailure as e:
+            _index_failed(collection, options, e)
+    return created
+
+
+async def ensure_indexes_async(db):
+    created = []
+    for collection, keys, options in INDEXES:
+        try:
+            created.append(await db[collection].create_index(keys, **options))
+        except OperationFailure as e:
+            _index_failed(collection, options, e)
+    return created
+
+
+def get_backend_queries():
+    """
+    The filters (and sorts) the backend actually issues, as
+    (label, collection, filter, sort).
+    """
+    return [
+        ("auth.verify_user_mobile", "users", {"mobile": "0000000000"}, None),
+        ("auth.create_user_email", "users", {"email": "probe@example.com"}, None),
+        ("auth.verify_user_email", "users", {"email": "probe@example.com", "password": "probe"}, None),
+        ("main.get_order", "orders", {"_id": ObjectId()}, None),
+        ("orders by status", "orders", orders.build_orders_filter(status="Placed"), None),
+        ("orders by mobile", "orders", orders.build_orders_filter(mobile="0000000000"), None),
+        ("orders by date range", "orders", orders.build_orders_filter(created_from="2024-01-01"), None),
+        ("check_mongo latest orders", "orders", {}, [("created_at", DESCENDING)]),
+    ]
+
+
+def _stages(plan):
+    """Yields every stage name in an explain plan tree."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _stages(value)
+
+
+def explain_queries(db=None):
+    """
+    Runs explain() on each backend query. Returns a list of
+    (label, stages, is_collscan).
+    """
+    db = db if db is not None else get_db()
+    results = []
+    for label, collection, query, sort in get_backend_queries():
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = list(_stages(plan))
+        results.append((label, stages, "COLLSCAN" in stages))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and verify MongoDB indexes")
+    parser.add_argument("--explain", action="store_true", help="explain backend queries and fail on COLLSCAN")
+    args = parser.parse_args()
+
+    created = ensure_indexes()
+    print(f"Indexes ensured: {', '.join(created)}")
+    failed = len(created) < len(INDEXES)
+    if failed:
+        print(f"❌ {len(INDEXES) - len(created)} index(es) could not be created, see the log")
+    if not args.explain:
+        return 1 if failed else 0
+
+    for label, stages, is_collscan in explain_queries():
+        marker = "❌ COLLSCAN" if is_collscan else "✅"
+        print(f"{marker} {label}: {' -> '.join(stages)}")
+        failed = failed or is_collscan
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
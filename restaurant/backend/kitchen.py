@@ -0,0 +1,138 @@
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+import os
+import threading
+from async_db import get_async_db
+import order_events
+from log import get_logger
+
+# Kitchen display queue.
+#
+# Active orders are kept in memory, sorted by the time the kitchen has to
+# start them: promised time minus estimated prep time. Order events insert,
+# move and remove single entries, so serving the queue is a slice of an
+# already sorted list instead of a query plus a sort per request.
+KITCHEN_PROMISE_MINUTES = float(os.getenv("KITCHEN_PROMISE_MINUTES", "45"))
+KITCHEN_BASE_PREP_MINUTES = 5.0
+KITCHEN_MINUTES_PER_ITEM = 1.5
+KITCHEN_MINUTES_PER_GUEST = 0.5
+
+ACTIVE_STATUSES = ("Placed", "Accepted", "Preparing")
+
+logger = get_logger("kitchen")
+
+
+def iter_cart_items(cart):
+    """Yields (name, quantity) from a stored cart."""
+    if isinstance(cart, dict):
+        cart = cart.values()
+    for item in cart or ():
+        if isinstance(item, dict):
+            yield item.get("name") or item.get("item_id"), int(item.get("quantity") or 0)
+
+
+def _parse_time(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.utcnow()
+
+
+def build_entry(doc):
+    items = [{"name": name, "quantity": qty} for name, qty in iter_cart_items(doc.get("cart"))]
+    total_items = sum(item["quantity"] for item in items)
+    people = doc.get("people_count") or 0
+    prep_minutes = KITCHEN_BASE_PREP_MINUTES + KITCHEN_MINUTES_PER_ITEM * total_items + KITCHEN_MINUTES_PER_GUEST * people
+    created_at = _parse_time(doc.get("created_at"))
+    promised_at = created_at + timedelta(minutes=KITCHEN_PROMISE_MINUTES)
+    start_by = promised_at - timedelta(minutes=prep_minutes)
+    return {
+        "order_id": str(doc["_id"]),
+        "order_status": doc.get("order_status"),
+        "customer_name": doc.get("customer_name"),
+        "people_count": people,
+        "items": items,
+        "total_items": total_items,
+        "prep_minutes": round(prep_minutes, 1),
+        "created_at": created_at.isoformat(),
+        "promised_at": promised_at.isoformat(),
+        "start_by": start_by.isoformat(),
+        # Earlier start first; the larger order wins a tie
+        "_key": (start_by, -prep_minutes, str(doc["_id"]))
+    }
+
+
+class KitchenQueue:
+    def __init__(self):
+        self._keys = []
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, doc):
+        order_id = str(doc["_id"])
+        if doc.get("order_status") not in ACTIVE_STATUSES:
+            self.remove(order_id)
+            return
+        with self._lock:
+            existing = self._entries.get(order_id)
+            if existing is not None and "cart" not in doc:
+                # Status-only update: keep the computed entry, just move it along
+                existing["order_status"] = doc.get("order_status")
+                return
+            entry = build_entry(doc)
+            if existing is not None:
+                self._remove_key(existing["_key"])
+            self._entries[order_id] = entry
+            insort(self._keys, entry["_key"])
+
+    def remove(self, order_id):
+        with self._lock:
+            entry = self._entries.pop(order_id, None)
+            if entry is not None:
+                self._remove_key(entry["_key"])
+
+    def _remove_key(self, key):
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def snapshot(self, limit=None, status=None):
+        with self._lock:
+            keys = self._keys if status else self._keys[:limit]
+            entries = [self._entries[key[2]] for key in keys]
+        if status:
+            entries = [e for e in entries if e["order_status"] == status][:limit]
+        return [{k: v for k, v in e.items() if k != "_key"} for e in entries]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, order_id):
+        return order_id in self._entries
+
+    def on_order_event(self, event_type, doc):
+        self.upsert(doc)
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._entries.clear()
+
+
+kitchen_queue = KitchenQueue()
+order_events.add_listener(kitchen_queue.on_order_event)
+
+
+async def load_active_orders():
+    """Seeds the queue from Mongo at startup (in the background); events keep it current."""
+    cursor = get_async_db()["orders"].find(
+        {"order_status": {"$in": list(ACTIVE_STATUSES)}},
+        {"cart": 1, "people_count": 1, "created_at": 1, "order_status": 1, "customer_name": 1}
+    )
+    async for doc in cursor:
+        # Runs in the background, so events may already have added newer versions
+        if str(doc["_id"]) not in kitchen_queue:
+            kitchen_queue.upsert(doc)
+    logger.info("Kitchen queue loaded", extra={"fields": {"active_orders": len(kitchen_queue)}})
@@ -0,0 +1,123 @@
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# Structured logging for the backend.
+#
+# Request threads only put records on a queue; a QueueListener thread
+# redacts, formats (one JSON object per line) and writes them, so stdout
+# I/O never happens on the request path. Hot-path DEBUG records are
+# sampled at LOG_DEBUG_SAMPLE_RATE before they are even queued.
+#
+# Structured data goes in `extra={"fields": {...}}`; fields named in
+# MASKED_FIELDS or REDACTED_FIELDS are masked wherever they appear.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+ROOT_LOGGER = "restaurant"
+MASKED_FIELDS = {"mobile", "customer_mobile"}
+REDACTED_FIELDS = {"upi_id", "address", "delivery_address", "password", "payment_details"}
+
+_listener = None
+
+
+def mask_mobile(value):
+    value = str(value)
+    return "*" * max(0, len(value) - 2) + value[-2:]
+
+
+def redact(value):
+    """Returns a copy of value with PII fields masked, at any nesting depth."""
+    if isinstance(value, dict):
+        clean = {}
+        for key, item in value.items():
+            if key in MASKED_FIELDS and item:
+                clean[key] = mask_mobile(item)
+            elif key in REDACTED_FIELDS and item:
+                clean[key] = "[REDACTED]"
+            else:
+                clean[key] = redact(item)
+        return clean
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(redact(fields))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Lets through only a fraction of DEBUG records; other levels always pass."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Drop rather than block a request when the writer falls behind
+            pass
+
+    def prepare(self, record):
+        # Formatting and redaction happen on the listener thread; just make
+        # the record safe to hand over.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging():
+    """Installs the queue handler on the `restaurant` logger (once per process)."""
+    global _listener
+    if _listener is not None:
+        return
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+    _listener = QueueListener(log_queue, stream, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(DebugSampler(LOG_DEBUG_SAMPLE_RATE))
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(LOG_LEVEL)
+    logger.addHandler(handler)
+    logger.propagate = False
+
+
+def get_logger(name):
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -1,14 +1,89 @@
-from typing import Optional, Any
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from typing import Optional, Any, List
+from fastapi import FastAPI, HTTPException, Query, Header, Request, Response
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from pydantic import BaseModel, ConfigDict, Field, AliasChoices, StrictInt, field_validator, model_validator
 from bson import ObjectId
 from datetime import datetime
+import asyncio
+import logging
 import auth
 import orders
+import status_cache
+import indexes
+import order_queue
+import idempotency
+import order_events
+import kitchen
+import menu_catalog
+import pricing
+import recommendations
+import metrics
+from log import get_logger
+from responses import FastJSONResponse, add_compression
+from etags import order_etag, etag_matches, not_modified
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, parse_after, fetch_page, stream_ndjson
 import uvicorn
-from db_connection import check_connection, get_db
+from db_connection import get_client, close_client, get_pool_stats
+from async_db import get_async_client, get_async_db, close_async_client, async_client_initialized
 
-app = FastAPI()
+logger = get_logger("main")
+recommender = recommendations.Recommender(menu_catalog.catalog)
+
+app = FastAPI(default_response_class=FastJSONResponse)
+add_compression(app)
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    timing, token = metrics.start_request()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["Server-Timing"] = timing.server_timing()
+        return response
+    finally:
+        # Label by route template, not raw path, to keep the series count bounded
+        route = request.scope.get("route")
+        metrics.finish_request(timing, token, request.method, getattr(route, "path", "unmatched"), status)
+
+_startup_tasks = set()
+
+def start_background_task(coro, failure_message):
+    async def run():
+        try:
+            await coro
+        except Exception as e:
+            logger.warning(failure_message, extra={"fields": {"error": str(e)}})
+    task = asyncio.get_running_loop().create_task(run())
+    _startup_tasks.add(task)
+    task.add_done_callback(_startup_tasks.discard)
+
+@app.on_event("startup")
+async def open_db_client():
+    # Create the shared pooled clients once per worker instead of per request
+    get_client()
+    get_async_client()
+    status_cache.start_status_refresher()
+    menu_catalog.catalog.refresh()
+    recommender.warm()
+    await order_queue.start_ingest_queue()
+    orders.start_fallback_reconciler()
+    await order_events.start_order_events()
+    # Background tasks like the status refresher: with Mongo unreachable,
+    # each would otherwise hold up startup for a server-selection timeout
+    start_background_task(kitchen.load_active_orders(), "Could not load the kitchen queue")
+    start_background_task(indexes.ensure_indexes_async(get_async_db()), "Could not ensure indexes")
+
+@app.on_event("shutdown")
+async def close_db_client():
+    for task in list(_startup_tasks):
+        task.cancel()
+    await status_cache.stop_status_refresher()
+    await order_queue.stop_ingest_queue()
+    await orders.stop_fallback_reconciler()
+    await order_events.stop_order_events()
+    await close_async_client()
+    close_client()
 
 class MobileSignup(BaseModel):
     mobile: str
@@ -24,17 +99,37 @@ class EmailLogin(BaseModel):
     email: str
     password: str
 
+class OrderStatusUpdate(BaseModel):
+    status: str
+    expected_status: Optional[str] = None
+
 class OrderItem(BaseModel):
-    name: str
-    price: float
-    quantity: int
+    """One cart line; display-only fields such as the image URL are dropped."""
+    model_config = ConfigDict(extra="ignore")
+
+    item_id: Optional[str] = None
+    name: Optional[str] = None
+    quantity: StrictInt = Field(ge=1, le=10000)
+    unit_price: Optional[float] = Field(None, validation_alias=AliasChoices("unit_price", "price"))
+
+    @model_validator(mode="after")
+    def require_item(self):
+        if not self.item_id and not self.name:
+            raise ValueError("cart line needs item_id or name")
+        return self
+
+class RecommendRequest(BaseModel):
+    meal_time: str
+    preference: str
+    people: int = Field(4, ge=1, le=5000)
+    appetite: Optional[str] = "Medium"
 
 class Order(BaseModel):
     name: str
     mobile: str
     address: str
     notes: Optional[str] = None
-    cart: dict
+    cart: List[OrderItem] = Field(min_length=1)
     total: float
     people: Optional[int] = 4
     appetite: Optional[str] = None
@@ -44,10 +139,18 @@ class Order(BaseModel):
     upi_id: Optional[str] = None
     upi_app: Optional[str] = None
 
+    @field_validator("cart", mode="before")
+    @classmethod
+    def cart_lines(cls, value):
+        # Older clients send the Streamlit session cart: {name: {name, price, image, quantity}}
+        if isinstance(value, dict):
+            return list(value.values())
+        return value
+
 
 @app.get("/")
-def read_root():
-    status_info = get_backend_status()
+async def read_root(if_none_match: Optional[str] = Header(None)):
+    status_info = await get_backend_status(if_none_match)
     return status_info
 
 @app.get("/health")
@@ -55,126 +158,269 @@ def health_check():
     """Simple health check"""
     return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
 
+@app.get("/pool/stats")
+def pool_stats():
+    """MongoDB connection pool statistics for this worker (sync and async clients share the counters)"""
+    stats = get_pool_stats()
+    stats["async_client_initialized"] = async_client_initialized()
+    return stats
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Request latency, MongoDB command and pool wait metrics in Prometheus text format"""
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/order/queue/stats")
+def order_queue_stats():
+    """Write-behind order ingestion queue statistics"""
+    if not order_queue.is_buffered():
+        return {"mode": order_queue.ORDER_INGEST_MODE}
+    return order_queue.ingest_queue.stats()
+
 @app.post("/signup/mobile")
-def signup_mobile(data: MobileSignup):
-    if auth.create_user_mobile(data.mobile):
+async def signup_mobile(data: MobileSignup):
+    if await auth.create_user_mobile_async(data.mobile):
         return {"message": "User created"}
     raise HTTPException(status_code=400, detail="User already exists")
 
 @app.post("/signup/email")
-def signup_email(data: EmailSignup):
-    if auth.create_user_email(data.email, data.password):
+async def signup_email(data: EmailSignup):
+    if await auth.create_user_email_async(data.email, data.password):
         return {"message": "User created"}
     raise HTTPException(status_code=400, detail="User already exists")
 
 @app.get("/verify/mobile/{mobile}")
-def verify_mobile(mobile: str):
-    return {"exists": auth.verify_user_mobile(mobile)}
+async def verify_mobile(mobile: str):
+    return {"exists": await auth.verify_user_mobile_async(mobile)}
 
 @app.post("/login/email")
-def login_email(data: EmailLogin):
-    if auth.verify_user_email(data.email, data.password):
+async def login_email(data: EmailLogin):
+    if await auth.verify_user_email_async(data.email, data.password):
         return {"message": "Login successful"}
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
 @app.get("/status")
-def get_backend_status():
-    """Comprehensive backend status check"""
-    try:
-        # Check database connection
-        db_status = check_connection()
-        
-        # Check collections
-        if db_status:
-            try:
-                db = get_db()
-                collections = db.list_collection_names()
-                orders_count = db["orders"].count_documents({})
-                users_count = db["users"].count_documents({})
-                
-                return {
-                    "status": "healthy",
-                    "database": "connected",
-                    "mongodb_details": {
-                        "database": "restaurant_db",
-                        "collections": collections,
-                        "orders_count": orders_count,
-                        "users_count": users_count
-                    },
-                    "endpoints": {
-                        "order_place": "/order/place (POST)",
-                        "get_orders": "/orders (GET)",
-                        "get_order": "/order/{id} (GET)",
-                        "auth_endpoints": "Available"
-                    }
-                }
-            except Exception as db_e:
-                return {
-                    "status": "partial",
-                    "database": "connection_error",
-                    "error": str(db_e)
-                }
-        else:
-            return {
-                "status": "unhealthy",
-                "database": "disconnected",
-                "fallback": "local_json_available"
-            }
-    except Exception as e:
-        return {
-            "status": "error",
-            "error": str(e)
-        }
+async def get_backend_status(if_none_match: Optional[str] = Header(None)):
+    """Backend status, served from the periodically refreshed snapshot (honors If-None-Match)"""
+    status_info = await status_cache.get_status()
+    etag = status_cache.get_status_etag()
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return FastJSONResponse(status_info, headers={"ETag": etag, "Cache-Control": "no-cache"})
 
 @app.get("/orders")
-def get_all_orders():
-    """Get all orders to verify data is stored"""
+async def get_all_orders(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    status: Optional[str] = None,
+    mobile: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    stream: bool = False
+):
+    """
+    Get orders one page at a time (pass next_after back as `after`),
+    or all matching orders as NDJSON with stream=true
+    """
+    try:
+        query = orders.build_orders_filter(status, mobile, created_from, created_to)
+        parse_after(after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
-        orders_collection = orders.get_orders_collection()
-        all_orders = list(orders_collection.find({}, {"_id": 0}))  # Exclude MongoDB _id
-        return {"orders": all_orders, "count": len(all_orders)}
+        orders_collection = orders.get_orders_collection_async()
+        if stream:
+            return StreamingResponse(
+                stream_ndjson(orders_collection, query, None, "order_id", after),
+                media_type="application/x-ndjson"
+            )
+        page, next_after = await fetch_page(orders_collection, query, None, "order_id", limit, after)
+        return FastJSONResponse({"orders": page, "count": len(page), "next_after": next_after})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/order/{order_id}")
-def get_order(order_id: str):
-    """Get specific order by ID"""
+@app.get("/orders/events")
+async def order_events_stream(request: Request):
+    """Server-sent events for every order creation and status change (kitchen screens)"""
+    subscription = order_events.bus.subscribe()
+    return StreamingResponse(
+        order_events.sse_stream(subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/orders/events/stats")
+def order_events_stats():
+    """Order event subscribers and source (change_stream or local)"""
+    return order_events.bus.stats()
+
+@app.get("/kitchen/queue")
+def kitchen_queue(limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE), status: Optional[str] = None):
+    """Active orders in the order the kitchen should start them (earliest start-by time first)"""
+    entries = kitchen.kitchen_queue.snapshot(limit, status)
+    return FastJSONResponse({"orders": entries, "count": len(entries), "active": len(kitchen.kitchen_queue)})
+
+@app.get("/order/{order_id}/events")
+async def single_order_events_stream(order_id: str, request: Request):
+    """Server-sent events for one order's status changes (customer tracking)"""
+    subscription = order_events.bus.subscribe(order_id)
+    return StreamingResponse(
+        order_events.sse_stream(subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/menu")
+def get_menu(meal_time: Optional[str] = None, preference: Optional[str] = None,
+             if_none_match: Optional[str] = Header(None)):
+    """The menu catalog, optionally narrowed to a meal time and/or preference (honors If-None-Match)"""
     try:
-        orders_collection = orders.get_orders_collection()
-        order = orders_collection.find_one({"_id": ObjectId(order_id)}, {"_id": 0})
-        if order:
-            return order
-        else:
+        body, etag = menu_catalog.catalog.response(meal_time, preference)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return Response(body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+@app.post("/recommend")
+def recommend(data: RecommendRequest):
+    """A ready-to-order package for the party, built from the menu catalog"""
+    try:
+        return FastJSONResponse(recommender.recommend(data.meal_time, data.preference, data.people, data.appetite))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/recommend/stats")
+def recommend_stats():
+    """Memoized recommendation count and hit rate for the current menu version"""
+    return recommender.stats()
+
+@app.get("/order/{order_id}")
+async def get_order(order_id: str, if_none_match: Optional[str] = Header(None)):
+    """Get specific order by ID (honors If-None-Match)"""
+    order = None
+    if order_queue.is_buffered():
+        order = order_queue.ingest_queue.lookup(order_id)
+    if order is None:
+        try:
+            object_id = ObjectId(order_id)
+        except Exception:
             raise HTTPException(status_code=404, detail="Order not found")
+        try:
+            orders_collection = orders.get_orders_collection_async()
+            order = await orders_collection.find_one({"_id": object_id})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    etag = order_etag(order)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return FastJSONResponse(
+        {k: v for k, v in order.items() if k != "_id"},
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
+
+@app.patch("/order/{order_id}/status")
+async def update_order_status(order_id: str, data: OrderStatusUpdate):
+    """Advance an order through Placed -> Accepted -> Preparing -> OutForDelivery -> Delivered (or Cancelled)"""
+    for status in (data.status, data.expected_status):
+        if status is not None and status not in orders.STATUS_TRANSITIONS:
+            raise HTTPException(status_code=422, detail=f"Unknown status: {status}")
+    try:
+        object_id = ObjectId(order_id)
+    except Exception:
+        raise HTTPException(status_code=404, detail="Order not found")
+    try:
+        order = await orders.update_order_status_async(object_id, data.status, data.expected_status)
+    except orders.OrderNotFound as e:
+        if order_queue.is_buffered() and order_queue.ingest_queue.lookup(order_id):
+            raise HTTPException(status_code=409, detail="Order is still being saved, retry shortly")
+        raise HTTPException(status_code=404, detail=str(e))
+    except orders.InvalidTransition as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    logger.info("Order status updated", extra={"fields": {"order_id": order_id, "status": data.status}})
+    return FastJSONResponse(
+        {k: v for k, v in order.items() if k != "_id"},
+        headers={"ETag": order_etag(order), "Cache-Control": "no-cache"}
+    )
 
 @app.get("/users")
-def get_all_users():
-    """Get all users to verify authentication system"""
+async def get_all_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    type: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    stream: bool = False
+):
+    """Get users page by page (or as NDJSON with stream=true) to verify authentication system"""
     try:
-        users_collection = get_db()["users"]
-        all_users = list(users_collection.find({}, {"_id": 0, "password": 0}))  # Exclude sensitive data
-        return {"users": all_users, "count": len(all_users)}
+        query = auth.build_users_filter(type, created_from, created_to)
+        parse_after(after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        users_collection = auth.get_collection_async()
+        projection = {"password": 0}  # Exclude sensitive data
+        if stream:
+            return StreamingResponse(
+                stream_ndjson(users_collection, query, projection, "user_id", after),
+                media_type="application/x-ndjson"
+            )
+        page, next_after = await fetch_page(users_collection, query, projection, "user_id", limit, after)
+        return FastJSONResponse({"users": page, "count": len(page), "next_after": next_after})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/order/place")
-def place_order(data: Order):
-    print(f"--- INCOMING ORDER REQUEST ---")
-    print(f"Data: {data.dict()}")
+async def place_order(data: Order, response: Response, idempotency_key: Optional[str] = Header(None)):
+    order_data = data.dict()
+    if logger.isEnabledFor(logging.DEBUG):
+        # Copied because pricing rewrites the cart before the queued record is formatted
+        logger.debug("Incoming order request", extra={"fields": {"order": dict(order_data)}})
+    try:
+        # Stored prices and total always come from the menu catalog
+        order_data["cart"], order_data["total"] = pricing.price_cart(order_data["cart"], order_data["total"])
+    except pricing.PricingError as e:
+        logger.info("Order rejected", extra={"fields": {"reason": str(e)}})
+        raise HTTPException(status_code=422, detail=str(e))
+    reserved_id = None
+    if idempotency_key:
+        request_fingerprint = idempotency.fingerprint(order_data)
+        try:
+            reserved_id, previous = await idempotency.begin(idempotency_key, request_fingerprint)
+        except idempotency.IdempotencyConflict as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except idempotency.IdempotencyMismatch as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if previous is not None:
+            logger.info("Idempotent replay", extra={"fields": {"order_id": previous.get("order_id")}})
+            response.headers["Idempotent-Replayed"] = "true"
+            return previous
     try:
-        order_id = orders.create_order(data.dict())
+        # A key store that just failed means Mongo is down; don't wait on it again
+        mongo_down = bool(idempotency_key) and not idempotency.store_available()
+        order_id = await orders.create_order_async(order_data, reserved_id, mongo_down)
         if order_id:
-            print(f"Order Success. ID: {order_id}")
-            return {"message": "Order placed successfully", "order_id": order_id}
+            logger.info("Order placed", extra={"fields": {"order_id": order_id}})
+            result = {"message": "Order placed successfully", "order_id": order_id}
+            if idempotency_key:
+                await idempotency.complete(idempotency_key, request_fingerprint, result)
+            return result
         else:
-            print("Order Failed: orders.create_order returned None")
+            logger.error("Order failed: orders.create_order returned None")
     except Exception as e:
-        print(f"Order Exception: {str(e)}")
+        logger.exception("Order exception")
+        if idempotency_key:
+            await idempotency.abort(idempotency_key)
         raise HTTPException(status_code=500, detail=str(e))
+    if idempotency_key:
+        await idempotency.abort(idempotency_key)
     raise HTTPException(status_code=500, detail="Failed to place order")
 
 if __name__ == "__main__":
-    print("backend is starting")
+    logger.info("backend is starting")
     uvicorn.run(app, host="127.0.0.1", port=8000, log_level="info")
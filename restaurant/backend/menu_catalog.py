@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from etags import content_etag
+from log import get_logger
+from responses import dumps
+
+# The menu catalog, shared by every frontend through GET /menu.
+#
+# The catalog lives in menu.json (meal time -> preference -> items, plus a
+# flat "Sweets" list) and is loaded into memory with lookup indexes by
+# meal time/preference, by preference alone and by item name. The file is
+# re-checked at most every MENU_RELOAD_SECONDS; when it changes the catalog
+# gets a new version and every cached response built from the old one is
+# dropped.
+MENU_FILE = os.getenv("MENU_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "menu.json"))
+MENU_RELOAD_SECONDS = float(os.getenv("MENU_RELOAD_SECONDS", "30"))
+
+SWEETS = "Sweets"
+
+logger = get_logger("menu")
+
+
+def item_id(name):
+    """Stable slug for a menu item, e.g. "Samosa (3 pcs)" -> "samosa-3-pcs"."""
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+class MenuCatalog:
+    def __init__(self, path=MENU_FILE):
+        self.path = path
+        self.version = None
+        self.menu = {}
+        self.by_slot = {}
+        self.by_preference = {}
+        self.by_name = {}
+        self.by_id = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._responses = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        mtime = os.path.getmtime(self.path)
+        doc = json.loads(raw)
+        menu = doc["menu"]
+
+        by_slot, by_preference, by_name, by_id = {}, {}, {}, {}
+        listed = set()
+        for meal_time, section in menu.items():
+            slots = {None: section} if meal_time == SWEETS else section
+            for preference, items in slots.items():
+                for item in items:
+                    item["id"] = item_id(item["name"])
+                    by_slot.setdefault((meal_time, preference), []).append(item)
+                    if preference is not None and (preference, item["id"]) not in listed:
+                        listed.add((preference, item["id"]))
+                        by_preference.setdefault(preference, []).append(item)
+                    entry = by_id.setdefault(item["id"], {
+                        "id": item["id"],
+                        "name": item["name"],
+                        "price": item["price"],
+                        "image": item.get("image"),
+                        "slots": []
+                    })
+                    entry["slots"].append({"meal_time": meal_time, "preference": preference})
+                    by_name[item["name"].lower()] = entry
+
+        # The content hash is part of the version, so an edit that forgets
+        # to bump "version" still invalidates everything built on the old menu
+        version = f'{doc.get("version", 0)}-{hashlib.sha1(raw).hexdigest()[:10]}'
+        with self._lock:
+            self.menu = menu
+            self.by_slot = by_slot
+            self.by_preference = by_preference
+            self.by_name = by_name
+            self.by_id = by_id
+            self._responses = {}
+            self.version = version
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+        logger.info("Menu catalog loaded", extra={"fields": {"version": version, "items": len(by_id)}})
+
+    def refresh(self):
+        """Reloads the file if it changed; a stat call at most every MENU_RELOAD_SECONDS."""
+        now = time.monotonic()
+        if self.version is not None and now - self._checked_at < MENU_RELOAD_SECONDS:
+            return
+        self._checked_at = now
+        try:
+            if self.version is None or os.path.getmtime(self.path) != self._mtime:
+                self.load()
+        except (OSError, ValueError, KeyError) as e:
+            if self.version is None:
+                raise
+            logger.error("Could not reload menu, keeping the loaded version", extra={"fields": {"error": str(e)}})
+
+    def lookup(self, name=None, id=None):
+        """Catalog entry by item id or (case-insensitive) name, or None."""
+        self.refresh()
+        if id is not None:
+            return self.by_id.get(id)
+        return self.by_name.get((name or "").lower())
+
+    def items(self, meal_time=None, preference=None):
+        self.refresh()
+        if preference is not None and preference not in self.by_preference:
+            raise ValueError(f"Unknown preference '{preference}'")
+        if meal_time == SWEETS:
+            # Sweets are shared by every preference
+            return self.by_slot[(SWEETS, None)]
+        if meal_time is not None and meal_time not in self.menu:
+            raise ValueError(f"Unknown meal_time '{meal_time}'")
+        if meal_time is None:
+            return self.by_preference[preference]
+        if preference is None:
+            return [item for items in self.menu[meal_time].values() for item in items]
+        return self.by_slot.get((meal_time, preference), [])
+
+    def response(self, meal_time=None, preference=None):
+        """
+        Serialized /menu body and its ETag, built once per catalog version
+        and filter combination.
+        """
+        self.refresh()
+        key = (meal_time, preference)
+        responses = self._responses
+        cached = responses.get(key)
+        if cached is not None:
+            return cached
+        version = self.version
+        if meal_time is None and preference is None:
+            payload = {"version": version, "menu": self.menu}
+        else:
+            payload = {
+                "version": version,
+                "meal_time": meal_time,
+                "preference": preference,
+                "items": self.items(meal_time, preference)
+            }
+        body = dumps(payload)
+        cached = (body, content_etag(body))
+        # Stored in the cache of the version it was built from, so a reload
+        # in between never leaves a stale body behind
+        responses[key] = cached
+        return cached
+
+
+catalog = MenuCatalog()
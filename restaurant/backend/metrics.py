@@ -0,0 +1,194 @@
+from contextvars import ContextVar
+from pymongo import monitoring
+import threading
+import time
+
+# Request and MongoDB instrumentation.
+#
+# Every HTTP request gets a RequestTiming in a context variable; pymongo's
+# command and pool listeners (registered globally, so they apply to both the
+# sync and async clients) add their durations to whatever request is
+# current. The middleware in main.py turns that into a Server-Timing header
+# and feeds the histograms rendered on /metrics in Prometheus text format.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+                sep = "," if base else ""
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {series["count"]}')
+                suffix = f"{{{base}}}" if base else ""
+                lines.append(f"{self.name}_sum{suffix} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{suffix} {series['count']}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+                lines.append(f"{self.name}{{{base}}} {value}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status"))
+http_request_db_time = Histogram(
+    "http_request_db_seconds", "Time spent in MongoDB commands per request.", ("method", "route"))
+mongo_command_duration = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency.", ("command",))
+mongo_command_failures = Counter(
+    "mongo_command_failures_total", "Failed MongoDB commands.", ("command",))
+mongo_pool_wait = Histogram(
+    "mongo_pool_checkout_wait_seconds", "Time waiting to check a connection out of the pool.", ())
+
+ALL_METRICS = [http_request_duration, http_request_db_time, mongo_command_duration,
+               mongo_command_failures, mongo_pool_wait]
+
+
+class RequestTiming:
+    __slots__ = ("started", "db_seconds", "db_commands", "pool_wait_seconds")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.db_commands = 0
+        self.pool_wait_seconds = 0.0
+
+    def server_timing(self):
+        total_ms = (time.perf_counter() - self.started) * 1000
+        return (f'app;dur={total_ms:.2f}, '
+                f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_commands} commands", '
+                f'pool;dur={self.pool_wait_seconds * 1000:.2f}')
+
+
+current_request = ContextVar("current_request", default=None)
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        seconds = event.duration_micros / 1_000_000
+        mongo_command_duration.observe(seconds, event.command_name)
+        timing = current_request.get()
+        if timing is not None:
+            timing.db_seconds += seconds
+            timing.db_commands += 1
+
+    def failed(self, event):
+        seconds = event.duration_micros / 1_000_000
+        mongo_command_duration.observe(seconds, event.command_name)
+        mongo_command_failures.inc(event.command_name)
+        timing = current_request.get()
+        if timing is not None:
+            timing.db_seconds += seconds
+            timing.db_commands += 1
+
+
+class PoolWaitListener(monitoring.ConnectionPoolListener):
+    def connection_checked_out(self, event):
+        seconds = getattr(event, "duration", None)
+        if seconds is None:
+            return
+        mongo_pool_wait.observe(seconds)
+        timing = current_request.get()
+        if timing is not None:
+            timing.pool_wait_seconds += seconds
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+# Global registration covers every MongoClient created afterwards
+monitoring.register(CommandMetricsListener())
+monitoring.register(PoolWaitListener())
+
+
+def start_request():
+    timing = RequestTiming()
+    return timing, current_request.set(timing)
+
+
+def finish_request(timing, token, method, route, status):
+    current_request.reset(token)
+    http_request_duration.observe(time.perf_counter() - timing.started, method, route, str(status))
+    http_request_db_time.observe(timing.db_seconds, method, route)
+
+
+def render_metrics():
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
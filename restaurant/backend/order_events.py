@@ -0,0 +1,219 @@
+from pymongo.errors import OperationFailure, PyMongoError
+import asyncio
+import os
+from async_db import get_async_db
+from log import get_logger
+from responses import dumps
+
+# Order event fan-out for the SSE endpoints.
+#
+# Events come from a MongoDB change stream on `orders` when the server
+# supports one (replica set / Atlas), so every worker sees every change.
+# On a standalone mongod (or with ORDER_EVENTS_SOURCE=local) the order
+# functions publish straight into this in-process bus instead.
+#
+# Each subscriber has a bounded queue. A slow subscriber never blocks the
+# publisher: when its queue is full the oldest event is dropped. Events are
+# status snapshots, so the newest one is always enough to catch up.
+ORDER_EVENTS_SOURCE = os.getenv("ORDER_EVENTS_SOURCE", "auto")
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("ORDER_EVENTS_QUEUE_SIZE", "64"))
+HEARTBEAT_SECONDS = float(os.getenv("ORDER_EVENTS_HEARTBEAT_SECONDS", "15"))
+
+CHANGE_STREAM_NOT_SUPPORTED = (40573, 40602)  # standalone server / not a replica set
+
+logger = get_logger("order_events")
+
+HEARTBEAT = object()
+
+
+def order_event(event_type, doc):
+    """The public event payload: ids and status only, no customer data."""
+    return {
+        "type": event_type,
+        "order_id": str(doc.get("_id")),
+        "order_status": doc.get("order_status"),
+        "version": doc.get("version"),
+        "updated_at": doc.get("updated_at") or doc.get("created_at")
+    }
+
+
+class Subscription:
+    __slots__ = ("queue", "order_id", "dropped")
+
+    def __init__(self, order_id=None, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.queue = asyncio.Queue(maxsize)
+        self.order_id = order_id
+        self.dropped = 0
+
+    def offer(self, event):
+        if self.order_id is not None and event["order_id"] != self.order_id:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class EventBus:
+    def __init__(self):
+        self._all = set()
+        self._by_order = {}
+        self.published = 0
+
+    def subscribe(self, order_id=None):
+        subscription = Subscription(order_id)
+        if order_id is None:
+            self._all.add(subscription)
+        else:
+            self._by_order.setdefault(order_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription.order_id is None:
+            self._all.discard(subscription)
+            return
+        watchers = self._by_order.get(subscription.order_id)
+        if watchers is not None:
+            watchers.discard(subscription)
+            if not watchers:
+                del self._by_order[subscription.order_id]
+
+    def publish(self, event):
+        self.published += 1
+        for subscription in self._all:
+            subscription.offer(event)
+        for subscription in self._by_order.get(event["order_id"], ()):
+            subscription.offer(event)
+
+    def heartbeat(self):
+        # Idle subscribers only; a busy one is already writing to its socket
+        for subscription in self._all:
+            if subscription.queue.empty():
+                subscription.queue.put_nowait(HEARTBEAT)
+        for watchers in self._by_order.values():
+            for subscription in watchers:
+                if subscription.queue.empty():
+                    subscription.queue.put_nowait(HEARTBEAT)
+
+    def stats(self):
+        return {
+            "source": source,
+            "subscribers": len(self._all) + sum(len(s) for s in self._by_order.values()),
+            "published": self.published
+        }
+
+
+bus = EventBus()
+source = "local"
+_watch_task = None
+_heartbeat_task = None
+
+
+# In-process consumers of full order documents (e.g. the kitchen queue).
+# They are called from whichever source is active, before subscribers.
+listeners = []
+
+
+def add_listener(callback):
+    """Registers callback(event_type, order_doc) for every order event."""
+    listeners.append(callback)
+
+
+def _dispatch(event_type, doc):
+    for callback in listeners:
+        try:
+            callback(event_type, doc)
+        except Exception:
+            logger.exception("Order event listener failed")
+    bus.publish(order_event(event_type, doc))
+
+
+def publish_local(event_type, doc):
+    """Called by the order functions; a no-op while a change stream is the source."""
+    if source == "local":
+        _dispatch(event_type, doc)
+
+
+async def _watch_orders():
+    global source
+    try:
+        stream = await get_async_db()["orders"].watch(
+            [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}],
+            full_document="updateLookup"
+        )
+    except OperationFailure as e:
+        if e.code not in CHANGE_STREAM_NOT_SUPPORTED and ORDER_EVENTS_SOURCE == "change_stream":
+            logger.error("Could not open the required order change stream, using local events", extra={"fields": {"error": str(e)}})
+        else:
+            logger.info("Change streams unavailable, using local order events")
+        return
+    except PyMongoError as e:
+        logger.warning("Could not open order change stream, using local events", extra={"fields": {"error": str(e)}})
+        return
+    source = "change_stream"
+    try:
+        async with stream:
+            async for change in stream:
+                doc = change.get("fullDocument")
+                if doc is None:
+                    continue
+                event_type = "order_created" if change["operationType"] == "insert" else "order_status"
+                _dispatch(event_type, doc)
+    except asyncio.CancelledError:
+        raise
+    except PyMongoError as e:
+        logger.warning("Order change stream stopped, using local events", extra={"fields": {"error": str(e)}})
+    source = "local"
+
+
+async def _heartbeat_loop():
+    while True:
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        bus.heartbeat()
+
+
+async def start_order_events():
+    global source, _watch_task, _heartbeat_task
+    if _heartbeat_task is None or _heartbeat_task.done():
+        _heartbeat_task = asyncio.get_running_loop().create_task(_heartbeat_loop())
+    # Local events until the change stream is open; it is opened in the
+    # background so an unreachable server doesn't hold up startup
+    source = "local"
+    if ORDER_EVENTS_SOURCE == "local":
+        return
+    if _watch_task is None or _watch_task.done():
+        _watch_task = asyncio.get_running_loop().create_task(_watch_orders())
+
+
+async def stop_order_events():
+    global _watch_task, _heartbeat_task
+    for task in (_watch_task, _heartbeat_task):
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    _watch_task = None
+    _heartbeat_task = None
+
+
+async def sse_stream(subscription, is_disconnected=None):
+    """
+    Server-sent events for one subscriber. Heartbeats arrive through the queue
+    from one shared timer (rather than a timeout per connection) and become
+    keepalive comments, so proxies keep idle connections open and
+    disconnects are noticed.
+    """
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            event = await subscription.queue.get()
+            if event is HEARTBEAT:
+                if is_disconnected is not None and await is_disconnected():
+                    return
+                yield b": keepalive\n\n"
+                continue
+            yield b"event: " + event["type"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+    finally:
+        bus.unsubscribe(subscription)
@@ -0,0 +1,313 @@
+from bson import ObjectId, json_util
+from pathlib import Path
+from pymongo.errors import BulkWriteError
+import asyncio
+import os
+import threading
+import time
+from async_db import get_async_db
+from fallback_journal import process_alive
+from log import get_logger
+
+# Write-behind order ingestion. With ORDER_INGEST_MODE=buffered,
+# /order/place journals the order to local disk, queues it and returns;
+# a background worker flushes the queue to Mongo with insert_many.
+# Order ids are assigned here, so replaying the journal after a crash can
+# never create a duplicate: the second insert of an _id is a duplicate key.
+ORDER_INGEST_MODE = os.getenv("ORDER_INGEST_MODE", "direct")
+ORDER_BATCH_SIZE = int(os.getenv("ORDER_BATCH_SIZE", "100"))
+ORDER_FLUSH_INTERVAL_MS = int(os.getenv("ORDER_FLUSH_INTERVAL_MS", "200"))
+ORDER_JOURNAL_PATH = Path(os.getenv("ORDER_JOURNAL_PATH", Path(__file__).parent / "orders_journal.jsonl"))
+
+MAX_RETRY_DELAY = 5.0
+CLAIMED_MARKER = ".adopting-"
+DUPLICATE_KEY = 11000
+
+logger = get_logger("order_queue")
+
+
+def journal_path(base, pid):
+    """orders_journal.jsonl -> orders_journal-<pid>.jsonl"""
+    base = Path(base)
+    return base.with_name(f"{base.stem}-{pid}{base.suffix}")
+
+
+def read_pending(path):
+    """{order id: doc} for the orders in a journal file without a commit record."""
+    orders = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json_util.loads(line)
+            except ValueError:
+                # Torn final line from a crash mid-write; the request never returned
+                continue
+            if record.get("op") == "order":
+                orders[str(record["doc"]["_id"])] = record["doc"]
+            elif record.get("op") == "commit":
+                for order_id in record["ids"]:
+                    orders.pop(order_id, None)
+    return orders
+
+
+class OrderJournal:
+    """
+    Append-only local journal. Every queued order is written (and fsynced)
+    before the request returns; a commit record is written once its batch
+    is in Mongo. Whatever has no commit record is replayed on restart.
+
+    Each process writes its own file (the pid is in the name), so uvicorn
+    workers never append to or truncate each other's journal. Journals left
+    by a process that has exited are adopted by the next one to start.
+    """
+
+    def __init__(self, base_path):
+        self.base_path = Path(base_path)
+        self.path = journal_path(self.base_path, os.getpid())
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+
+    def _write(self, records):
+        data = "".join(json_util.dumps(record) + "\n" for record in records)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append_orders(self, docs):
+        with self._lock:
+            self._write([{"op": "order", "doc": doc} for doc in docs])
+            self._uncommitted += len(docs)
+
+    def commit(self, order_ids):
+        with self._lock:
+            self._write([{"op": "commit", "ids": [str(order_id) for order_id in order_ids]}])
+            self._uncommitted = max(0, self._uncommitted - len(order_ids))
+
+    def pending(self):
+        """Orders in this process's journal that were never committed, in arrival order."""
+        if not self.path.exists():
+            return []
+        with self._lock:
+            orders = read_pending(self.path)
+            self._uncommitted = len(orders)
+        return list(orders.values())
+
+    def journals(self):
+        """Every per-process journal file next to the base path."""
+        directory = self.base_path.parent
+        if not directory.exists():
+            return []
+        return sorted(directory.glob(f"{self.base_path.stem}-*{self.base_path.suffix}"))
+
+    def _orphans(self):
+        directory = self.base_path.parent
+        # Adoptions interrupted by a crash go back to their original name first
+        for path in directory.glob(f"{self.base_path.stem}*{CLAIMED_MARKER}*"):
+            pid = int(path.name.rsplit(CLAIMED_MARKER, 1)[1])
+            if pid != os.getpid() and not process_alive(pid):
+                path.rename(path.with_name(path.name.rsplit(CLAIMED_MARKER, 1)[0]))
+        orphans = []
+        for path in self.journals():
+            try:
+                pid = int(path.stem.rsplit("-", 1)[1])
+            except ValueError:
+                continue
+            if pid != os.getpid() and not process_alive(pid):
+                orphans.append(path)
+        if self.base_path.exists():
+            # Shared journal written before journals were per process
+            orphans.append(self.base_path)
+        return orphans
+
+    def adopt_orphans(self):
+        """
+        Moves the uncommitted orders of journals whose process has exited
+        into this process's journal, where they are replayed and truncated
+        like our own. A journal is claimed by renaming it, so exactly one
+        process adopts it. Returns the number of orders adopted.
+        """
+        if not self.base_path.parent.exists():
+            return 0
+        adopted = 0
+        for path in self._orphans():
+            claimed = path.with_name(f"{path.name}{CLAIMED_MARKER}{os.getpid()}")
+            try:
+                path.rename(claimed)
+            except FileNotFoundError:
+                continue  # Adopted by another worker
+            docs = list(read_pending(claimed).values())
+            if docs:
+                self.append_orders(docs)
+            claimed.unlink()
+            adopted += len(docs)
+        return adopted
+
+    def truncate_if_committed(self):
+        """Empties this process's journal once every order in it has been committed."""
+        with self._lock:
+            if self._uncommitted:
+                return False
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.flush()
+                os.fsync(f.fileno())
+            return True
+
+    def remove_if_committed(self):
+        """Deletes this process's journal on a clean shutdown with nothing left to replay."""
+        with self._lock:
+            if self._uncommitted or not self.path.exists():
+                return False
+            self.path.unlink()
+            return True
+
+
+class OrderIngestQueue:
+    def __init__(self, journal, batch_size=ORDER_BATCH_SIZE, flush_interval_ms=ORDER_FLUSH_INTERVAL_MS):
+        self.journal = journal
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue = None
+        self._worker = None
+        self._pending = {}
+        self.flushed = 0
+        self.batches = 0
+        self.flush_errors = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        adopted = await asyncio.to_thread(self.journal.adopt_orphans)
+        if adopted:
+            logger.info("Adopted orders from exited workers' journals", extra={"fields": {"count": adopted}})
+        replay = await asyncio.to_thread(self.journal.pending)
+        for doc in replay:
+            self._pending[str(doc["_id"])] = doc
+            self._queue.put_nowait(doc)
+        if replay:
+            logger.info("Replaying journaled orders", extra={"fields": {"count": len(replay)}})
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Flushes what is queued (if Mongo is reachable) and stops the worker."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if batch:
+            try:
+                await self._insert(batch)
+            except Exception as e:
+                # Still in the journal; replayed on next start
+                logger.warning("Queued orders left in journal", extra={"fields": {"count": len(batch), "error": str(e)}})
+                return
+        if not self._pending:
+            await asyncio.to_thread(self.journal.remove_if_committed)
+
+    async def enqueue(self, order_doc: dict):
+        order_doc.setdefault("_id", ObjectId())
+        await asyncio.to_thread(self.journal.append_orders, [order_doc])
+        order_id = str(order_doc["_id"])
+        self._pending[order_id] = order_doc
+        self._queue.put_nowait(order_doc)
+        return order_id
+
+    def lookup(self, order_id: str):
+        """Returns an accepted order that has not reached Mongo yet, if any."""
+        return self._pending.get(order_id)
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            delay = 0.1
+            while True:
+                try:
+                    await self._insert(batch)
+                    break
+                except Exception as e:
+                    self.flush_errors += 1
+                    logger.warning("Order flush failed, retrying", extra={"fields": {"count": len(batch), "error": str(e)}})
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    async def _insert(self, batch):
+        try:
+            await get_async_db()["orders"].insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Duplicates are orders already inserted by an earlier attempt or replay
+            errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY]
+            if errors:
+                raise
+        ids = [doc["_id"] for doc in batch]
+        await asyncio.to_thread(self.journal.commit, ids)
+        for order_id in ids:
+            self._pending.pop(str(order_id), None)
+        self.flushed += len(batch)
+        self.batches += 1
+        if not self._pending:
+            # Everything journaled is in Mongo; keep the journal from growing forever
+            await asyncio.to_thread(self.journal.truncate_if_committed)
+
+    def stats(self):
+        return {
+            "mode": ORDER_INGEST_MODE,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "flush_errors": self.flush_errors
+        }
+
+
+ingest_queue = None
+
+
+def is_buffered():
+    return ingest_queue is not None
+
+
+def journaled(order_id: str, base_path=ORDER_JOURNAL_PATH):
+    """Whether an uncommitted order is in any worker's journal, live or exited."""
+    journal = OrderJournal(base_path)
+    paths = journal.journals() + ([journal.base_path] if journal.base_path.exists() else [])
+    for path in paths:
+        try:
+            if order_id in read_pending(path):
+                return True
+        except FileNotFoundError:
+            continue  # Adopted or removed meanwhile
+    return False
+
+
+async def start_ingest_queue():
+    global ingest_queue
+    if ORDER_INGEST_MODE != "buffered" or ingest_queue is not None:
+        return
+    ingest_queue = OrderIngestQueue(OrderJournal(ORDER_JOURNAL_PATH))
+    await ingest_queue.start()
+
+
+async def stop_ingest_queue():
+    global ingest_queue
+    if ingest_queue is not None:
+        await ingest_queue.stop()
+    ingest_queue = None
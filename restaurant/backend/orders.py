@@ -1,19 +1,34 @@
 from datetime import datetime
-import json
+import asyncio
 import os
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from db_connection import get_db
+from async_db import get_async_db, check_connection_async
+from fallback_journal import FallbackJournal, replay_async
+import order_queue
+import order_events
+from log import get_logger
+
+ORDER_FALLBACK_RECONCILE_SECONDS = float(os.getenv("ORDER_FALLBACK_RECONCILE_SECONDS", "30"))
+
+logger = get_logger("orders")
+
+fallback = FallbackJournal()
+_reconcile_task = None
 
 def get_orders_collection():
     db = get_db()
     return db["orders"]
 
-def create_order(order_data: dict):
+def get_orders_collection_async():
+    return get_async_db()["orders"]
+
+def build_order_doc(order_data: dict):
     """
-    Saves an order to the database with a local JSON fallback.
+    Maps the incoming order payload to the stored order document.
     """
-    print(f"DEBUG: Incoming Order Data -> {order_data}")
-    
-    order_doc = {
+    return {
         "customer_name": order_data.get("name"),
         "customer_mobile": order_data.get("mobile"),
         "delivery_address": order_data.get("address"),
@@ -28,22 +43,198 @@ def create_order(order_data: dict):
         "upi_id": order_data.get("upi_id"),
         "upi_app": order_data.get("upi_app"),
         "order_status": "Placed",
+        "version": 1,
         "created_at": datetime.utcnow().isoformat()
     }
 
+def save_order_fallback(order_doc: dict):
+    """
+    Appends the order to the local fallback journal.
+    Returns the order id, which the reconciler keeps when replaying it.
+    """
+    try:
+        order_id = fallback.append(order_doc)
+        logger.warning("Order saved to local fallback journal", extra={"fields": {"order_id": order_id}})
+        return order_id
+    except Exception:
+        logger.critical("Could not save order locally", exc_info=True)
+        return None
+
+async def reconcile_fallback():
+    """
+    Replays journaled fallback orders into Mongo once it is reachable again.
+    Returns the number of orders replayed.
+    """
+    if not await asyncio.to_thread(fallback.has_pending) or not await check_connection_async():
+        return 0
+    return await replay_async(fallback, get_orders_collection_async())
+
+async def _reconcile_loop():
+    while True:
+        try:
+            replayed = await reconcile_fallback()
+            if replayed:
+                logger.info("Replayed fallback orders into MongoDB", extra={"fields": {"count": replayed}})
+        except Exception as e:
+            logger.warning("Fallback replay failed, will retry", extra={"fields": {"error": str(e)}})
+        await asyncio.sleep(ORDER_FALLBACK_RECONCILE_SECONDS)
+
+def start_fallback_reconciler():
+    global _reconcile_task
+    fallback.recover_claims()
+    if _reconcile_task is None or _reconcile_task.done():
+        _reconcile_task = asyncio.get_running_loop().create_task(_reconcile_loop())
+
+async def stop_fallback_reconciler():
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        try:
+            await _reconcile_task
+        except asyncio.CancelledError:
+            pass
+    _reconcile_task = None
+
+def create_order(order_data: dict):
+    """
+    Saves an order to the database with a local JSON fallback.
+    """
+    order_doc = build_order_doc(order_data)
+
     try:
         orders = get_orders_collection()
         result = orders.insert_one(order_doc)
-        print(f"✅ Saved to MongoDB Atlas. ID: {result.inserted_id}")
+        logger.info("Order saved to MongoDB", extra={"fields": {"order_id": str(result.inserted_id)}})
         return str(result.inserted_id)
     except Exception as e:
-        print(f"⚠️ MongoDB Failed: {str(e)}. Falling back to local file.")
-        # Fallback: Save to local JSON
-        try:
-            with open("orders_fallback.json", "a") as f:
-                f.write(json.dumps(order_doc) + "\n")
-            print("💾 Saved to local orders_fallback.json")
-            return "local_fallback_id"
-        except Exception as fe:
-            print(f"❌ Critical Failure: Could not save locally. {str(fe)}")
-            return None
+        logger.error("MongoDB insert failed, falling back to local journal", extra={"fields": {"error": str(e)}})
+        # Fallback: Save to the local journal (same _id, so a replay can't duplicate it)
+        return save_order_fallback(order_doc)
+
+async def create_order_async(order_data: dict, order_id=None, mongo_down=False):
+    """
+    Async version of create_order; the fallback file write runs in a thread.
+    order_id pre-assigns the ObjectId (used for idempotent retries).
+    mongo_down skips the insert and journals the order right away, for a
+    request that has already timed out against Mongo.
+    """
+    order_doc = build_order_doc(order_data)
+    if order_id is not None:
+        order_doc["_id"] = order_id
+
+    if order_queue.is_buffered():
+        # Journaled locally and flushed to Mongo in batches by the ingest worker
+        order_id = await order_queue.ingest_queue.enqueue(order_doc)
+        order_events.publish_local("order_created", order_doc)
+        return order_id
+
+    if mongo_down:
+        order_id = await asyncio.to_thread(save_order_fallback, order_doc)
+        if order_id:
+            order_events.publish_local("order_created", order_doc)
+        return order_id
+
+    try:
+        orders = get_orders_collection_async()
+        result = await orders.insert_one(order_doc)
+        logger.info("Order saved to MongoDB", extra={"fields": {"order_id": str(result.inserted_id)}})
+        order_events.publish_local("order_created", order_doc)
+        return str(result.inserted_id)
+    except DuplicateKeyError:
+        # A pre-assigned id that an earlier attempt already stored
+        return str(order_doc["_id"])
+    except Exception as e:
+        logger.error("MongoDB insert failed, falling back to local journal", extra={"fields": {"error": str(e)}})
+        order_id = await asyncio.to_thread(save_order_fallback, order_doc)
+        if order_id:
+            order_events.publish_local("order_created", order_doc)
+        return order_id
+
+async def order_accepted(order_id):
+    """
+    Whether an order id was accepted: stored in Mongo, waiting in the ingest
+    queue, or in a local journal (any worker's) waiting to be replayed.
+    """
+    if await get_orders_collection_async().find_one({"_id": order_id}, {"_id": 1}) is not None:
+        return True
+    if order_queue.is_buffered() and order_queue.ingest_queue.lookup(str(order_id)):
+        return True
+    return await asyncio.to_thread(_journaled, str(order_id))
+
+def _journaled(order_id: str):
+    return order_queue.journaled(order_id) or fallback.contains(order_id)
+
+def build_orders_filter(status=None, mobile=None, created_from=None, created_to=None):
+    """
+    Builds the Mongo filter for order listings.
+    created_at is stored as an ISO string, so the date range compares as strings.
+    """
+    query = {}
+    if status:
+        query["order_status"] = status
+    if mobile:
+        query["customer_mobile"] = mobile
+    if created_from or created_to:
+        query["created_at"] = {}
+        if created_from:
+            query["created_at"]["$gte"] = datetime.fromisoformat(created_from).isoformat()
+        if created_to:
+            query["created_at"]["$lt"] = datetime.fromisoformat(created_to).isoformat()
+    return query
+
+# Order status lifecycle. Each status maps to the statuses it may move to;
+# Delivered and Cancelled are final.
+STATUS_TRANSITIONS = {
+    "Placed": ["Accepted", "Cancelled"],
+    "Accepted": ["Preparing", "Cancelled"],
+    "Preparing": ["OutForDelivery", "Cancelled"],
+    "OutForDelivery": ["Delivered", "Cancelled"],
+    "Delivered": [],
+    "Cancelled": []
+}
+
+class OrderNotFound(Exception):
+    pass
+
+class InvalidTransition(Exception):
+    pass
+
+def allowed_prior_statuses(new_status):
+    return [status for status, targets in STATUS_TRANSITIONS.items() if new_status in targets]
+
+async def update_order_status_async(order_id, new_status, expected_status=None):
+    """
+    Moves an order to new_status in a single find_one_and_update guarded by
+    the prior status, so concurrent updates can't skip or undo a step.
+    Returns the updated order. Raises OrderNotFound / InvalidTransition.
+    """
+    if new_status not in STATUS_TRANSITIONS:
+        raise InvalidTransition(f"Unknown status: {new_status}")
+    prior = allowed_prior_statuses(new_status)
+    if expected_status is not None:
+        if expected_status not in prior:
+            raise InvalidTransition(f"Cannot move from {expected_status} to {new_status}")
+        prior = [expected_status]
+    if not prior:
+        raise InvalidTransition(f"No status can move to {new_status}")
+
+    now = datetime.utcnow().isoformat()
+    orders = get_orders_collection_async()
+    updated = await orders.find_one_and_update(
+        {"_id": order_id, "order_status": {"$in": prior}},
+        {
+            "$set": {"order_status": new_status, "updated_at": now},
+            "$inc": {"version": 1},
+            "$push": {"status_history": {"status": new_status, "at": now}}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is not None:
+        order_events.publish_local("order_status", updated)
+        return updated
+
+    # Only the failure path pays for a second read, to explain why
+    current = await orders.find_one({"_id": order_id}, {"order_status": 1})
+    if current is None:
+        raise OrderNotFound("Order not found")
+    raise InvalidTransition(f"Cannot move from {current.get('order_status')} to {new_status}")
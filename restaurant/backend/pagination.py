@@ -0,0 +1,66 @@
+from bson import ObjectId
+from bson.errors import InvalidId
+from responses import dumps
+
+# Keyset pagination over _id. ObjectIds grow with insertion time, so paging
+# by _id is also paging by creation order, and every page is a single
+# index range scan no matter how deep the client has scrolled.
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+def parse_after(after):
+    """
+    Converts an `after` cursor to an ObjectId. Raises ValueError if invalid.
+    """
+    if after is None:
+        return None
+    try:
+        return ObjectId(after)
+    except (InvalidId, TypeError):
+        raise ValueError(f"Invalid cursor: {after}")
+
+
+def keyset_query(query: dict, after=None):
+    after_id = parse_after(after)
+    if after_id is None:
+        return dict(query)
+    return {**query, "_id": {"$gt": after_id}}
+
+
+def to_public(doc: dict, id_field: str):
+    """Replaces the raw _id with a string id field."""
+    doc = dict(doc)
+    doc_id = doc.pop("_id", None)
+    if doc_id is not None:
+        doc[id_field] = str(doc_id)
+    return doc
+
+
+async def fetch_page(collection, query: dict, projection: dict, id_field: str, limit=DEFAULT_PAGE_SIZE, after=None):
+    """
+    Returns (documents, next_after) for one page. next_after is None on the last page.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # Ask for one extra document to know if another page exists
+    cursor = collection.find(keyset_query(query, after), projection).sort("_id", 1).limit(limit + 1)
+    docs = await cursor.to_list(limit + 1)
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_after = str(docs[-1]["_id"]) if has_more else None
+    return [to_public(doc, id_field) for doc in docs], next_after
+
+
+async def stream_ndjson(collection, query: dict, projection: dict, id_field: str, after=None):
+    """
+    Yields matching documents as NDJSON lines straight from the cursor,
+    so memory stays bounded by the batch size rather than the result size.
+    """
+    cursor = collection.find(keyset_query(query, after), projection).sort("_id", 1).batch_size(STREAM_BATCH_SIZE)
+    try:
+        async for doc in cursor:
+            yield dumps(to_public(doc, id_field)) + b"\n"
+    finally:
+        await cursor.close()
@@ -0,0 +1,55 @@
+from menu_catalog import catalog
+
+# Server-side pricing for POST /order/place.
+#
+# Client prices and totals are only checked, never trusted: every line is
+# priced from the in-memory menu catalog (a dict lookup per line, no
+# database round trip) and the stored total is the one computed here.
+PRICE_TOLERANCE = 0.01
+
+
+class PricingError(Exception):
+    """The cart does not match the menu catalog."""
+
+
+def _cart_lines(cart):
+    # The Streamlit apps send {name: {name, price, image, quantity}}
+    if isinstance(cart, dict):
+        return list(cart.values())
+    return list(cart or [])
+
+
+def price_cart(cart, client_total=None):
+    """
+    Returns (line_items, total) priced from the catalog. Raises PricingError
+    for unknown items, bad quantities, and client prices or a client total
+    that disagree with the catalog.
+    """
+    lines = _cart_lines(cart)
+    if not lines:
+        raise PricingError("Cart is empty")
+    items = []
+    total = 0.0
+    for line in lines:
+        if not isinstance(line, dict):
+            raise PricingError("Malformed cart line")
+        entry = catalog.lookup(name=line.get("name"), id=line.get("item_id"))
+        if entry is None:
+            raise PricingError(f"Unknown menu item: {line.get('item_id') or line.get('name')}")
+        quantity = line.get("quantity")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            raise PricingError(f"Invalid quantity for {entry['name']}")
+        client_price = line.get("unit_price", line.get("price"))
+        if client_price is not None and abs(client_price - entry["price"]) > PRICE_TOLERANCE:
+            raise PricingError(f"Price for {entry['name']} is {entry['price']}, not {client_price}")
+        items.append({
+            "item_id": entry["id"],
+            "name": entry["name"],
+            "quantity": quantity,
+            "unit_price": entry["price"]
+        })
+        total += entry["price"] * quantity
+    total = round(total, 2)
+    if client_total is not None and abs(client_total - total) > PRICE_TOLERANCE:
+        raise PricingError(f"Order total is {total}, not {client_total}")
+    return items, total
@@ -0,0 +1,213 @@
+from collections import OrderedDict
+import os
+import threading
+
+# Package ("bundle") recommendations for a party.
+#
+# This used to live inline in the Streamlit CHECKOUT step, which rescanned
+# the menu once per category with list-based de-duplication. Here every
+# menu slot gets a one-off index: each item's lowercased name is matched
+# against the category keywords once, so building a bundle only walks the
+# short per-category candidate lists and tracks used items in a set.
+# Quantities are plain arithmetic on the party size, so a party of 500
+# costs the same as a party of 2.
+#
+# The module only uses the standard library so the frontends can load it
+# as an offline fallback.
+
+# Category -> name keywords, in the order the bundle is assembled
+CATEGORIES = (
+    ("bread", ("roti", "naan", "dosa", "paratha", "bhature", "chapathi", "chapthi")),
+    ("curry", ("curry", "paneer", "kofta", "masala", "tikka", "mushroom", "malai")),
+    ("rice", ("rice", "biryani", "pallav", "poha", "fried rice")),
+    ("thali", ("thali",)),
+    ("special", ("bonda", "chole", "idli", "vada"))
+)
+PREFERRED_SWEET = "jamun"
+APPETITE_FACTORS = {"Low": 0.7, "Medium": 1.0, "Large": 1.3}
+APPETITE_LEVELS = tuple(APPETITE_FACTORS)
+
+RECOMMEND_CACHE_SIZE = int(os.getenv("RECOMMEND_CACHE_SIZE", "4096"))
+# Party sizes precomputed for every slot and appetite at startup
+WARM_PARTY_SIZES = range(1, int(os.getenv("RECOMMEND_WARM_MAX_PEOPLE", "20")) + 1)
+
+
+def appetite_level(appetite):
+    """Low, Medium or Large, also from labels such as "Large - Hungry Kings"."""
+    for level in ("Low", "Large"):
+        if level in (appetite or ""):
+            return level
+    return "Medium"
+
+
+def portion_factor(appetite):
+    return APPETITE_FACTORS[appetite_level(appetite)]
+
+
+def _key(item):
+    return item.get("id") or item["name"]
+
+
+class SlotIndex:
+    """Keyword -> category candidates for one meal time/preference, built once."""
+
+    def __init__(self, items):
+        self.items = list(items)
+        self.by_category = {category: [] for category, _ in CATEGORIES}
+        for item in self.items:
+            name = item["name"].lower()
+            for category, keywords in CATEGORIES:
+                if any(keyword in name for keyword in keywords):
+                    self.by_category[category].append(item)
+
+    def pick(self, category, count, used):
+        """
+        Up to count unused items for the category, topped up with any unused
+        items in menu order (the checkout step always filled every slot).
+        """
+        selected = []
+        for pool in (self.by_category[category], self.items):
+            for item in pool:
+                if len(selected) == count:
+                    return selected
+                key = _key(item)
+                if key not in used:
+                    used.add(key)
+                    selected.append(item)
+        return selected
+
+
+def pick_sweet(sweets):
+    return next((item for item in sweets if PREFERRED_SWEET in item["name"].lower()), sweets[0] if sweets else None)
+
+
+def build_bundle(index, sweets, people, appetite=None):
+    """[{"item", "quantity", "category"}] for a party of `people`."""
+    factor = portion_factor(appetite)
+    servings = people * factor
+    used = set()
+    bread = index.pick("bread", 1, used)
+    # Fewer curry varieties for small parties to avoid overwhelming the order
+    curries = index.pick("curry", 2 if people >= 6 else 1, used)
+    rice = index.pick("rice", 1, used)
+    thali = index.pick("thali", 1, used)
+    special = index.pick("special", 1, used)
+    sweet = pick_sweet(sweets)
+
+    bundle = []
+    # Bread: 1 per person adjusted by appetite
+    for item in bread:
+        bundle.append({"item": item, "quantity": max(1, round(servings)), "category": "bread"})
+    # Curries: 1 bowl per 2-3 people
+    if curries:
+        per_curry = max(1, max(1, round(servings / 2.5)) // len(curries))
+        for item in curries:
+            bundle.append({"item": item, "quantity": per_curry, "category": "curry"})
+    # Rice: 1 plate per 3 people with bread, else 1 per person
+    for item in rice:
+        bundle.append({"item": item, "quantity": max(1, round(servings / (3.0 if bread else 1.2))), "category": "rice"})
+    # Thali: 1 per 2-3 people
+    for item in thali:
+        bundle.append({"item": item, "quantity": max(1, round(servings / 2.5)), "category": "thali"})
+    # Specials: 1 per 3-4 people
+    for item in special:
+        bundle.append({"item": item, "quantity": max(1, round(servings / 3.5)), "category": "special"})
+    # Sweets: 1 per person
+    if sweet is not None:
+        bundle.append({"item": sweet, "quantity": max(1, round(servings)), "category": "sweet"})
+    return bundle
+
+
+def bundle_lines(bundle):
+    """Cart-ready lines: the menu item fields plus quantity and category."""
+    return [dict(entry["item"], quantity=entry["quantity"], category=entry["category"]) for entry in bundle]
+
+
+class Recommender:
+    """
+    Bundles from the menu catalog. A bundle depends only on the slot, the
+    appetite level and the party size, so results are memoized under that
+    key (LRU, RECOMMEND_CACHE_SIZE entries) and served as dict lookups.
+    Slot indexes and memoized bundles are dropped when the catalog version
+    changes.
+    """
+
+    def __init__(self, catalog, cache_size=RECOMMEND_CACHE_SIZE):
+        self.catalog = catalog
+        self.cache_size = cache_size
+        self._version = None
+        self._indexes = {}
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self):
+        self.catalog.refresh()
+        version = self.catalog.version
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._indexes = {}
+                    self._memo.clear()
+                    self._version = version
+        return version
+
+    def _index(self, meal_time, preference):
+        index = self._indexes.get((meal_time, preference))
+        if index is None:
+            if meal_time in self.catalog.menu and not isinstance(self.catalog.menu[meal_time], dict):
+                # Sweets (or any other slot without preferences) is not a meal
+                raise ValueError(f"No package for meal_time '{meal_time}'")
+            # Validates meal_time and preference (ValueError)
+            index = SlotIndex(self.catalog.items(meal_time, preference))
+            self._indexes[(meal_time, preference)] = index
+        return index
+
+    def recommend(self, meal_time, preference, people, appetite=None):
+        version = self._check_version()
+        appetite = appetite_level(appetite)
+        key = (meal_time, preference, appetite, people)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        lines = bundle_lines(build_bundle(self._index(meal_time, preference), self.catalog.items("Sweets"), people, appetite))
+        result = {
+            "version": version,
+            "meal_time": meal_time,
+            "preference": preference,
+            "people": people,
+            "appetite": appetite,
+            "items": lines,
+            "total": round(sum(line["price"] * line["quantity"] for line in lines), 2)
+        }
+        with self._lock:
+            if version == self._version:
+                self._memo[key] = result
+                while len(self._memo) > self.cache_size:
+                    self._memo.popitem(last=False)
+        return result
+
+    def warm(self, party_sizes=WARM_PARTY_SIZES):
+        """Precomputes every slot x appetite x party size (run at startup)."""
+        self._check_version()
+        for meal_time, section in self.catalog.menu.items():
+            if not isinstance(section, dict):
+                continue
+            for preference in section:
+                for appetite in APPETITE_LEVELS:
+                    for people in party_sizes:
+                        self.recommend(meal_time, preference, people, appetite)
+
+    def stats(self):
+        return {
+            "version": self._version,
+            "cached": len(self._memo),
+            "cache_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,54 @@
+from bson import ObjectId
+from datetime import datetime
+from fastapi.responses import JSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+# Responses below this many bytes are not worth compressing
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """Serializes to JSON bytes with orjson when available (ObjectId/datetime included)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson. Returning one directly from an endpoint
+    also skips FastAPI's jsonable_encoder pass over the content.
+    """
+
+    def render(self, content):
+        return dumps(content)
+
+
+def add_compression(app):
+    """gzip (or brotli, if brotli-asgi is installed) for responses above COMPRESSION_MIN_SIZE."""
+    if BrotliMiddleware is not None:
+        # Server-sent event streams must not be buffered by the compressor
+        app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True,
+                           excluded_handlers=[r".*/events$"])
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
@@ -0,0 +1,125 @@
+from datetime import datetime
+import asyncio
+import os
+import time
+from async_db import get_async_db, check_connection_async
+from db_connection import DB_NAME
+from etags import content_etag
+from responses import dumps
+
+# /status is polled by the frontend on every rerun and by load balancer
+# health checks, so it is served from a snapshot that a background task
+# refreshes every STATUS_TTL_SECONDS instead of querying Mongo per hit.
+STATUS_TTL_SECONDS = float(os.getenv("STATUS_TTL_SECONDS", "10"))
+
+_snapshot = None
+_refreshed_at = None
+_refreshed_at_wall = None
+_etag = None
+_refresh_task = None
+
+
+async def compute_status():
+    """Comprehensive backend status check"""
+    try:
+        # Check database connection
+        db_status = await check_connection_async()
+
+        # Check collections
+        if db_status:
+            try:
+                db = get_async_db()
+                collections = await db.list_collection_names()
+                # Counts come from collection metadata instead of a full scan
+                orders_count = await db["orders"].estimated_document_count()
+                users_count = await db["users"].estimated_document_count()
+
+                return {
+                    "status": "healthy",
+                    "database": "connected",
+                    "mongodb_details": {
+                        "database": DB_NAME,
+                        "collections": collections,
+                        "orders_count": orders_count,
+                        "users_count": users_count
+                    },
+                    "endpoints": {
+                        "order_place": "/order/place (POST)",
+                        "get_orders": "/orders (GET)",
+                        "get_order": "/order/{id} (GET)",
+                        "auth_endpoints": "Available"
+                    }
+                }
+            except Exception as db_e:
+                return {
+                    "status": "partial",
+                    "database": "connection_error",
+                    "error": str(db_e)
+                }
+        else:
+            return {
+                "status": "unhealthy",
+                "database": "disconnected",
+                "fallback": "local_json_available"
+            }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error": str(e)
+        }
+
+
+async def refresh_status():
+    global _snapshot, _refreshed_at, _refreshed_at_wall, _etag
+    snapshot = await compute_status()
+    # Tag the content, not the refresh time: pollers get 304s until something changes
+    _etag = content_etag(dumps(snapshot), weak=True)
+    _snapshot = snapshot
+    _refreshed_at = time.monotonic()
+    _refreshed_at_wall = datetime.utcnow().isoformat()
+    return snapshot
+
+
+async def _refresh_loop():
+    while True:
+        await refresh_status()
+        await asyncio.sleep(STATUS_TTL_SECONDS)
+
+
+def start_status_refresher():
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.get_running_loop().create_task(_refresh_loop())
+
+
+async def stop_status_refresher():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+    _refresh_task = None
+
+
+def get_status_etag():
+    return _etag
+
+
+async def get_status():
+    """
+    Returns the cached status snapshot along with how old it is.
+    Mongo is only touched on the first call, or when no refresher task is
+    running (e.g. the app was started without its startup hooks) and the
+    snapshot has expired.
+    """
+    refresher_running = _refresh_task is not None and not _refresh_task.done()
+    if _snapshot is None or (not refresher_running and time.monotonic() - _refreshed_at > STATUS_TTL_SECONDS):
+        await refresh_status()
+    return {
+        **_snapshot,
+        "refreshed_at": _refreshed_at_wall,
+        "age_seconds": round(time.monotonic() - _refreshed_at, 3),
+        "ttl_seconds": STATUS_TTL_SECONDS
+    }
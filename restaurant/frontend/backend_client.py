@@ -0,0 +1,214 @@
+from collections import deque
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+import requests
+from requests.adapters import HTTPAdapter
+import streamlit as st
+
+# HTTP client and backend health for the Streamlit apps.
+#
+# All calls go through one keep-alive requests.Session per backend URL
+# (a Streamlit resource, shared by every session), so they reuse pooled
+# connections instead of opening a new TCP connection each time. Each
+# endpoint has its own timeout; idempotent calls (GETs, and POSTs sent with
+# an Idempotency-Key) are retried with exponential backoff on connection
+# errors and 502/503/504.
+#
+# Streamlit re-runs the whole script after nearly every click, so the
+# health probe must not hit the network per rerun. One GET /status result
+# is shared by all sessions for HEALTH_TTL_SECONDS, and a circuit breaker
+# skips the probe entirely for a while after a failure, so a down backend
+# costs one short timeout per cooldown instead of one per rerun.
+HEALTH_TTL_SECONDS = 10
+BREAKER_COOLDOWN_SECONDS = 5
+BREAKER_MAX_COOLDOWN_SECONDS = 60
+
+# (connect, read) seconds per endpoint
+TIMEOUTS = {
+    "status": (0.5, 1.5),
+    "menu": (0.5, 3),
+    "order": (1, 10),
+    "recommend": (0.5, 3),
+    "default": (1, 5)
+}
+POOL_SIZE = 16
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 0.2
+RETRY_STATUSES = {502, 503, 504}
+LATENCY_SAMPLES = 200
+
+OFFLINE = {"available": False, "status": "offline", "database": "unknown"}
+
+
+class CircuitBreaker:
+    """Opens after a failure; the cooldown doubles on each consecutive failure."""
+
+    def __init__(self, cooldown=BREAKER_COOLDOWN_SECONDS, max_cooldown=BREAKER_MAX_COOLDOWN_SECONDS):
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        return time.monotonic() >= self.open_until
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.open_until = 0.0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            delay = min(self.max_cooldown, self.cooldown * 2 ** (self.failures - 1))
+            self.open_until = time.monotonic() + delay
+
+
+class EndpointStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 1) if ordered else None
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "last_ms": round(self.samples[-1], 1) if self.samples else None
+        }
+
+
+class BackendClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        # Retries are handled in request() so they can depend on the call
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, endpoint):
+        with self._lock:
+            return self.stats.setdefault(endpoint, EndpointStats())
+
+    def _record(self, stats, started, error):
+        # Called from script threads and the outbox's workers at once
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats.calls += 1
+            stats.errors += error
+            stats.samples.append(elapsed_ms)
+
+    def request(self, method, path, endpoint="default", retries=None, **kwargs):
+        """
+        One backend call with the endpoint's timeout. Raises
+        requests.RequestException once the attempts are used up.
+        """
+        headers = kwargs.get("headers") or {}
+        idempotent = method in ("GET", "HEAD") or "Idempotency-Key" in headers
+        attempts = 1 + (retries if retries is not None else (RETRY_ATTEMPTS - 1 if idempotent else 0))
+        stats = self._stats(endpoint)
+        timeout = TIMEOUTS.get(endpoint, TIMEOUTS["default"])
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, self.base_url + path, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(stats, started, error=True)
+                if last:
+                    raise
+            else:
+                done = response.status_code not in RETRY_STATUSES or last
+                self._record(stats, started, error=done and response.status_code >= 500)
+                if done:
+                    return response
+            with self._lock:
+                stats.retries += 1
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt * (0.5 + random.random()))
+
+    def summary(self):
+        with self._lock:
+            return {endpoint: stats.summary() for endpoint, stats in self.stats.items()}
+
+
+@st.cache_resource
+def get_backend_client(backend_url="http://localhost:8000"):
+    return BackendClient(backend_url)
+
+
+def idempotency_key(payload):
+    """
+    Same key for the same order from the same session, so a resubmit after
+    a timeout is deduplicated by the backend; a changed cart gets a new key.
+    """
+    session_id = st.session_state.setdefault("client_session_id", uuid.uuid4().hex)
+    body = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(f"{session_id}:{body}".encode("utf-8")).hexdigest()
+
+
+@st.cache_resource
+def health_breaker():
+    return CircuitBreaker()
+
+
+@st.cache_data(ttl=HEALTH_TTL_SECONDS, show_spinner=False)
+def backend_health(backend_url="http://localhost:8000"):
+    """{"available", "status", "database"} from the backend's /status snapshot."""
+    breaker = health_breaker()
+    if not breaker.allow():
+        return OFFLINE
+    try:
+        # No retries: the breaker and the cache already absorb failures
+        response = get_backend_client(backend_url).request("GET", "/status", "status", retries=0)
+        data = response.json() if response.status_code == 200 else {}
+    except (requests.RequestException, ValueError):
+        breaker.record_failure()
+        return OFFLINE
+    breaker.record_success()
+    return {
+        "available": True,
+        "status": data.get("status", "error"),
+        "database": data.get("database", "unknown")
+    }
+
+
+def check_backend(backend_url="http://localhost:8000"):
+    """(backend reachable, database connected), from the cached probe."""
+    health = backend_health(backend_url)
+    return health["available"], health["database"] == "connected"
+
+
+def debug_enabled():
+    return os.getenv("FOODIE_DEBUG") == "1" or st.query_params.get("debug") == "1"
+
+
+def render_debug_panel(backend_url="http://localhost:8000"):
+    """Per-endpoint call latency in the sidebar (FOODIE_DEBUG=1 or ?debug=1)."""
+    if not debug_enabled():
+        return
+    client = get_backend_client(backend_url)
+    with st.sidebar.expander("Backend calls", expanded=False):
+        summary = client.summary()
+        if summary:
+            st.table([{"endpoint": endpoint, **stats} for endpoint, stats in summary.items()])
+        else:
+            st.caption("No backend calls yet")
+        breaker = health_breaker()
+        st.caption(f"Health breaker: {'open' if not breaker.allow() else 'closed'} ({breaker.failures} consecutive failures)")
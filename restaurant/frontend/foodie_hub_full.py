@@ -1,6 +1,7 @@
 import streamlit as st
 import pytz
 from datetime import datetime
+from menu_client import load_menu, recommend_bundle
 
 # Configuration
 st.set_page_config(page_title="Foodie Hub | Premium Dining", page_icon="🍽️", layout="wide")
@@ -17,6 +18,8 @@ if "order_details" not in st.session_state:
     }
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+if "prepared" not in st.session_state:
+    st.session_state.prepared = False
 
 # Helper functions
 def add_message(role, content):
@@ -37,49 +40,7 @@ def get_current_meal_time():
         return "Night (Dinner)"
 
 # Menu data
-MENU = {
-    "Morning (Breakfast)": {
-        "Veg": [
-            {"name": "Masala Dosa", "price": 120, "image": "https://wallpaperaccess.com/full/6340448.jpg"},
-            {"name": "Idli Vada", "price": 80, "image": "https://as1.ftcdn.net/v2/jpg/04/65/28/88/1000_F_465288827_zBiEkb_660x660.jpg"},
-            {"name": "Poha", "price": 60, "image": "https://thumbs.dreamstime.com/b/poha-23333662.jpg"}
-        ],
-        "Non-Veg": [
-            {"name": "Bread Omelette", "price": 80, "image": "https://tse2.mm.bing.net/th/id/OIP.0G9LjhrRb4VglpXOs54JjAHaKX?pid=Api&P=0&h=180"},
-            {"name": "Egg Bhurji", "price": 90, "image": "http://eggcellent.recipes/wp-content/uploads/2024/08/Indian-Egg-Bhurji-Recipe-1024x1024.png"}
-        ]
-    },
-    "Afternoon (Lunch)": {
-        "Veg": [
-            {"name": "Veg Biryani", "price": 280, "image": "https://img.freepik.com/premium-photo/traditional-indian-veg-biryani-banana-leaf_1179130-190160.jpg?w=2000"},
-            {"name": "Palak Paneer with chapathi", "price": 220, "image": "https://img.freepik.com/premium-photo/indian-palak-paneer-with-spinach-cottage-cheese_1072167-2540.jpg?w=2000"}
-        ],
-        "Non-Veg": [
-            {"name": "Chicken Biryani", "price": 300, "image": "https://static.vecteezy.com/system/resources/previews/040/703/949/non_2x/ai-generated-royal-feast-master-the-art-of-chicken-biryani-at-home-generative-ai-photo.jpg"},
-            {"name": "Egg Curry", "price": 210, "image": "https://static.vecteezy.com/system/resources/previews/050/436/451/large_2x/spicy-indian-egg-curry-served-parathas-garnished-with-fresh-coriander-and-a-side-of-raita-photo.jpg"}
-        ]
-    },
-    "Evening (Snacks)": {
-        "Veg": [
-            {"name": "Paneer Tikka", "price": 290, "image": "https://img.freepik.com/premium-photo/photography-tasty-indian-paneer-tikka_1288657-46631.jpg"},
-            {"name": "Samosa (3 pcs)", "price": 50, "image": "https://thehimalayantreasure.pl/wp-content/uploads/2018/09/chicken-samosa.jpg"}
-        ],
-        "Non-Veg": [
-            {"name": "Chicken Nuggets", "price": 200, "image": "http://www.proofdc.com/wp-content/uploads/media/02/58716144-crispy-baked-chicken-nuggets-recipe-proofdc.jpg"},
-            {"name": "Egg Puff", "price": 50, "image": "https://nodashofgluten.com/wp-content/uploads/2025/02/Egg-Puff-Recipe-Kerala-Style-3.png.webp"}
-        ]
-    },
-    "Night (Dinner)": {
-        "Veg": [
-            {"name": "Butter Naan & Paneer", "price": 350, "image": "https://media-cdn.tripadvisor.com/media/photo-m/1280/1a/54/fd/77/paneer-butter-masala.jpg"},
-            {"name": "Veg Fried Rice", "price": 240, "image": "https://thedelishrecipe.com/wp-content/uploads/2024/05/vegetable-fried-rice.jpg"}
-        ],
-        "Non-Veg": [
-            {"name": "Tandoori Chicken", "price": 280, "image": "https://img.freepik.com/premium-photo/indian-spices-barbecue-murgh-tandoori-tandoori-chicken-with-raita-lime-chapati-onion-rings-served-dish-isolated-dark-background-top-view-food_689047-1446.jpg?w=1380"},
-            {"name": "Chicken Curry & Roti", "price": 320, "image": "https://themayakitchen.com/wp-content/uploads/2019/06/CURRY.jpg"}
-        ]
-    }
-}
+MENU = load_menu()
 
 # Header
 st.title("🍽️ Foodie Hub")
@@ -173,15 +134,12 @@ elif st.session_state.step == "CHECKOUT":
         add_message("assistant", msg)
         st.rerun()
 
-    # Auto-fill cart with sample items
-    available_items = MENU[timing][pref]
-    st.session_state.order_details["cart"] = {}
-    
-    # Add 2-3 items to cart
-    for i, item in enumerate(available_items[:3]):
-        item_data = item.copy()
-        item_data["quantity"] = 1
-        st.session_state.order_details["cart"][item_data["name"]] = item_data
+    # Auto-fill cart with the recommended package (once; reruns keep the cart and its edits)
+    if not st.session_state.prepared:
+        appetite = st.session_state.order_details.get("appetite") or "Medium"
+        bundle = recommend_bundle(MENU, timing, pref, num_people, appetite)
+        st.session_state.order_details["cart"] = {item["name"]: item for item in bundle}
+        st.session_state.prepared = True
 
     # Display cart
     st.markdown(f"### 🍱 Recommended Package for {num_people} People")
@@ -0,0 +1,76 @@
+import importlib.util
+import json
+import os
+import requests
+import streamlit as st
+from backend_client import get_backend_client
+
+# Menu catalog for the Streamlit apps, fetched from the backend's GET /menu.
+#
+# Each app used to carry its own copy of MENU. Now they all read the same
+# catalog: from the backend when it is up, otherwise from the menu.json the
+# backend serves. Fetches are cached for MENU_CACHE_SECONDS and then
+# revalidated with If-None-Match, so an unchanged menu costs a 304.
+MENU_CACHE_SECONDS = 300
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+MENU_FILE = os.path.join(BACKEND_DIR, "menu.json")
+
+_last = {"etag": None, "menu": None}
+
+
+def _bundled_menu():
+    with open(MENU_FILE, encoding="utf-8") as f:
+        return json.load(f)["menu"]
+
+
+@st.cache_data(ttl=MENU_CACHE_SECONDS, show_spinner=False)
+def load_menu(backend_url="http://localhost:8000"):
+    headers = {"If-None-Match": _last["etag"]} if _last["etag"] else {}
+    try:
+        response = get_backend_client(backend_url).request("GET", "/menu", "menu", headers=headers)
+        if response.status_code == 304 and _last["menu"] is not None:
+            return _last["menu"]
+        response.raise_for_status()
+        _last["menu"] = response.json()["menu"]
+        _last["etag"] = response.headers.get("ETag")
+        return _last["menu"]
+    except (requests.RequestException, ValueError, KeyError):
+        return _last["menu"] or _bundled_menu()
+
+
+def items_for_preference(menu, preference):
+    """Every item for a preference across meal times (first occurrence wins)."""
+    seen = set()
+    items = []
+    for meal_time, section in menu.items():
+        if not isinstance(section, dict):
+            continue
+        for item in section.get(preference, []):
+            if item["name"] not in seen:
+                seen.add(item["name"])
+                items.append(item)
+    return items
+
+
+@st.cache_resource
+def _local_recommendations():
+    # The backend's recommendations module is standard-library only, so the
+    # apps can build the same package while the backend is unreachable
+    spec = importlib.util.spec_from_file_location("recommendations", os.path.join(BACKEND_DIR, "recommendations.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def recommend_bundle(menu, meal_time, preference, people, appetite, backend_url="http://localhost:8000"):
+    """Cart lines ({name, price, image, quantity, ...}) for the party, from POST /recommend."""
+    body = {"meal_time": meal_time, "preference": preference, "people": people, "appetite": appetite}
+    try:
+        response = get_backend_client(backend_url).request("POST", "/recommend", "recommend", json=body, retries=0)
+        if response.status_code == 200:
+            return response.json()["items"]
+    except (requests.RequestException, ValueError, KeyError):
+        pass
+    recommendations = _local_recommendations()
+    index = recommendations.SlotIndex(menu[meal_time][preference])
+    return recommendations.bundle_lines(recommendations.build_bundle(index, menu["Sweets"], people, appetite))
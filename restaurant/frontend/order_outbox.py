@@ -0,0 +1,161 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import json
+import logging
+import os
+import threading
+import time
+import requests
+import streamlit as st
+from backend_client import get_backend_client
+
+# Background order submission for the Streamlit apps.
+#
+# "Confirm Order" only writes the order to a local outbox file and hands it
+# to a worker thread, so the script run never waits on the backend; the UI
+# polls status(key) instead. Orders the backend could not take (offline,
+# 5xx) stay in the outbox and are retried every OUTBOX_RETRY_SECONDS, also
+# after a restart. Every attempt reuses the order's Idempotency-Key, so a
+# retry can never place the order twice.
+OUTBOX_FILE = os.getenv("ORDER_OUTBOX_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "order_outbox.json"))
+OUTBOX_RETRY_SECONDS = float(os.getenv("ORDER_OUTBOX_RETRY_SECONDS", "15"))
+SUBMIT_WORKERS = 4
+RESULTS_KEPT = 1000
+
+SENDING = "sending"
+PLACED = "placed"
+QUEUED = "queued"
+REJECTED = "rejected"
+
+logger = logging.getLogger(__name__)
+
+
+class OrderOutbox:
+    def __init__(self, backend_url, path=OUTBOX_FILE):
+        self.client = get_backend_client(backend_url)
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = self._load()
+        self._results = OrderedDict()
+        self._inflight = set()
+        self._executor = ThreadPoolExecutor(SUBMIT_WORKERS, thread_name_prefix="order-submit")
+        self._wake = threading.Event()
+        threading.Thread(target=self._retry_loop, name="order-outbox", daemon=True).start()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            # Keep the file for manual recovery instead of overwriting it on the next save
+            corrupt_path = f"{self.path}.corrupt-{int(time.time())}"
+            os.replace(self.path, corrupt_path)
+            logger.warning("Order outbox %s is unreadable; moved it to %s and started empty", self.path, corrupt_path)
+            return {}
+
+    def _save(self):
+        # Called with the lock held; write-then-rename so a crash never leaves half a file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._pending, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _set_result(self, key, result):
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > RESULTS_KEPT:
+            self._results.popitem(last=False)
+
+    def submit(self, order_data, key):
+        """Stores the order in the outbox and sends it in the background."""
+        with self._lock:
+            if key in self._inflight or self._results.get(key, {}).get("state") == PLACED:
+                return
+            if key not in self._pending:
+                self._pending[key] = {"order": order_data, "queued_at": datetime.now().isoformat(), "attempts": 0}
+                self._save()
+            self._inflight.add(key)
+        self._executor.submit(self._send, key)
+
+    def status(self, key):
+        """{"state": sending|placed|queued|rejected, "order_id"?, "error"?}"""
+        with self._lock:
+            if key in self._inflight:
+                return {"state": SENDING}
+            if key in self._results:
+                return self._results[key]
+            if key in self._pending:
+                return {"state": QUEUED}
+        return {"state": REJECTED, "error": "Unknown order"}
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _send(self, key):
+        with self._lock:
+            entry = self._pending.get(key)
+        try:
+            if entry is None:
+                return
+            try:
+                response = self.client.request(
+                    "POST", "/order/place", "order",
+                    json=entry["order"], headers={"Idempotency-Key": key}
+                )
+            except requests.RequestException as e:
+                self._requeue(key, str(e))
+                return
+            if response.status_code == 200:
+                order_id = response.json().get("order_id", "unknown")
+                self._finish(key, {"state": PLACED, "order_id": order_id})
+            elif response.status_code == 409 or response.status_code >= 500:
+                # 409: an earlier attempt with this key is still in progress
+                self._requeue(key, f"Backend returned {response.status_code}")
+            else:
+                try:
+                    detail = response.json().get("detail")
+                except ValueError:
+                    detail = response.text
+                self._finish(key, {"state": REJECTED, "error": str(detail)})
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+
+    def _requeue(self, key, error):
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry["attempts"] += 1
+                entry["last_error"] = error
+                self._save()
+            self._set_result(key, {"state": QUEUED, "error": error})
+
+    def _finish(self, key, result):
+        with self._lock:
+            if self._pending.pop(key, None) is not None:
+                self._save()
+            self._set_result(key, result)
+
+    def _retry_loop(self):
+        while True:
+            self._wake.wait(OUTBOX_RETRY_SECONDS)
+            self._wake.clear()
+            with self._lock:
+                keys = [key for key in self._pending if key not in self._inflight]
+                self._inflight.update(keys)
+            for key in keys:
+                self._executor.submit(self._send, key)
+
+    def retry_now(self):
+        self._wake.set()
+
+
+@st.cache_resource
+def get_order_outbox(backend_url="http://localhost:8000"):
+    return OrderOutbox(backend_url)
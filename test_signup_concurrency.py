@@ -0,0 +1,82 @@
+"""
+Signup race test: many threads sign up the same mobile number at once and
+exactly one of them may create the user.
+
+Needs a reachable MongoDB (MONGO_URI, see restaurant/backend/.env) and is
+skipped otherwise. It works in a throwaway database (DB_NAME is set
+before the backend is imported) that is dropped afterwards, never in
+restaurant_db. Run with `python -m pytest test_signup_concurrency.py`
+or `python test_signup_concurrency.py`.
+"""
+import os
+import sys
+import threading
+import unittest
+import uuid
+
+# Before db_connection reads it
+os.environ["DB_NAME"] = f"restaurant_test_{uuid.uuid4().hex[:12]}"
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "restaurant", "backend"))
+
+import auth
+from db_connection import DB_NAME, check_connection, get_client
+from indexes import ensure_indexes
+
+RACE_MOBILE = "9111111111"
+THREADS = 200
+
+
+class SignupConcurrencyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if DB_NAME != os.environ["DB_NAME"]:
+            # db_connection was imported earlier in this process; don't touch its database
+            raise unittest.SkipTest(f"db_connection already bound to {DB_NAME}")
+        if not check_connection():
+            raise unittest.SkipTest("MongoDB is not reachable")
+        ensure_indexes()
+        cls.users = auth.get_collection()
+
+    @classmethod
+    def tearDownClass(cls):
+        get_client().drop_database(DB_NAME)
+
+    def setUp(self):
+        self.users.delete_many({"mobile": RACE_MOBILE})
+
+    def tearDown(self):
+        self.users.delete_many({"mobile": RACE_MOBILE})
+
+    def test_one_mobile_many_threads_creates_one_user(self):
+        barrier = threading.Barrier(THREADS)
+        results = []
+        errors = []
+        lock = threading.Lock()
+
+        def signup():
+            barrier.wait()
+            try:
+                created = auth.create_user_mobile(RACE_MOBILE)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                return
+            with lock:
+                results.append(created)
+
+        threads = [threading.Thread(target=signup) for _ in range(THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), THREADS)
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(results.count(False), THREADS - 1)
+        self.assertEqual(self.users.count_documents({"mobile": RACE_MOBILE}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()